@@ -22,7 +22,19 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 
 # Import your Models here in order for them to be visible
-from app.db.models import user_model
+from app.db.models import (
+    user_model,
+    profile_model,
+    google_account_model,
+    chat_model,
+    goal_model,
+    resources_model,
+    Email_model,
+    email_summary_model,
+    prompts_model,
+    gmail_sync_model,
+    job_model,
+)
 
 target_metadata = [Base.metadata]
 
@@ -0,0 +1,189 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+The tables exactly as the old `create_all` start-up step built them. Databases
+created that way already have them, run `alembic stamp 0001` on them before
+upgrading. Tables added since then come in later revisions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('user_full_name', sa.String(length=100), nullable=False),
+        sa.Column('user_email', sa.String(length=250), nullable=False),
+        sa.Column('user_phone', sa.String(length=10), nullable=False),
+        sa.Column('user_hashed_password', sa.String(), nullable=False),
+        sa.Column('user_is_admin', sa.Boolean(), nullable=False),
+        sa.Column('user_data', sa.Boolean(), nullable=False),
+        sa.Column('user_created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index('ix_users_user_id', 'users', ['user_id'])
+    op.create_index('ix_users_user_email', 'users', ['user_email'], unique=True)
+
+    op.create_table(
+        'profiles',
+        sa.Column('profile_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('education_level', sa.String(length=100), nullable=True),
+        sa.Column('institution', sa.String(length=150), nullable=True),
+        sa.Column('board_or_university', sa.String(length=150), nullable=True),
+        sa.Column('current_semester', sa.Integer(), nullable=True),
+        sa.Column('subjects_enrolled', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('target_exam', sa.String(length=100), nullable=True),
+        sa.Column('learning_style', sa.String(length=50), nullable=True),
+        sa.Column('preferred_content_type', sa.String(length=50), nullable=True),
+        sa.Column('language_preference', sa.String(length=20), nullable=True),
+        sa.Column('study_time_preference', sa.String(length=20), nullable=True),
+        sa.Column('session_duration_preference', sa.Integer(), nullable=True),
+        sa.Column('reminder_frequency', sa.String(length=20), nullable=True),
+        sa.Column('focus_level', sa.String(length=20), nullable=True),
+        sa.Column('available_hours_per_week', sa.Integer(), nullable=True),
+        sa.Column(
+            'study_days',
+            postgresql.ARRAY(sa.String()),
+            server_default=sa.text("ARRAY['Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday']"),
+            nullable=True,
+        ),
+        sa.Column('motivation_level', sa.Float(), nullable=True),
+        sa.Column('preferred_breaks', sa.String(length=50), nullable=True),
+        sa.Column('study_goals', sa.JSON(), nullable=True),
+        sa.Column('strong_subjects', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('weak_subjects', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('previous_scores', sa.JSON(), nullable=True),
+        sa.Column('learning_gaps', sa.JSON(), nullable=True),
+        sa.Column('career_goal', sa.String(length=100), nullable=True),
+        sa.Column('desired_skills', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('job_preference', sa.String(length=100), nullable=True),
+        sa.Column('certifications_interest', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('profile_created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('profile_updated_date', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('profile_id'),
+        sa.UniqueConstraint('user_id'),
+    )
+    op.create_index('ix_profiles_profile_id', 'profiles', ['profile_id'])
+
+    op.create_table(
+        'google_accounts',
+        sa.Column('google_account_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('google_email', sa.String(), nullable=False),
+        sa.Column('access_token', sa.String(), nullable=False),
+        sa.Column('refresh_token', sa.String(), nullable=False),
+        sa.Column('token_expiry', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('google_account_id'),
+    )
+    op.create_index('ix_google_accounts_google_account_id', 'google_accounts', ['google_account_id'])
+    op.create_index('ix_google_accounts_google_email', 'google_accounts', ['google_email'], unique=True)
+
+    op.create_table(
+        'chats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('chat_title', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_chats_id', 'chats', ['id'])
+
+    op.create_table(
+        'goals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_goals_id', 'goals', ['id'])
+
+    op.create_table(
+        'resources',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('resource_type', sa.String(), nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_resources_id', 'resources', ['id'])
+
+    op.create_table(
+        'emails',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('message_id', sa.String(), nullable=True),
+        sa.Column('thread_id', sa.String(), nullable=True),
+        sa.Column('sender', sa.String(), nullable=True),
+        sa.Column('recipient', sa.String(), nullable=True),
+        sa.Column('subject', sa.String(), nullable=True),
+        sa.Column('date', sa.String(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('summary_generated', sa.Boolean(), nullable=False),
+        sa.Column('raw', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_emails_id', 'emails', ['id'])
+    op.create_index('ix_emails_message_id', 'emails', ['message_id'], unique=True)
+
+    op.create_table(
+        'email_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('message_id', sa.String(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_email_summaries_id', 'email_summaries', ['id'])
+    op.create_index('ix_email_summaries_message_id', 'email_summaries', ['message_id'], unique=True)
+
+    op.create_table(
+        'prompts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_index('ix_prompts_id', 'prompts', ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('prompts')
+    op.drop_table('email_summaries')
+    op.drop_table('emails')
+    op.drop_table('resources')
+    op.drop_table('goals')
+    op.drop_table('chats')
+    op.drop_table('google_accounts')
+    op.drop_table('profiles')
+    op.drop_table('users')
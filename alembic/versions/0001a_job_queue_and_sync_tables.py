@@ -0,0 +1,73 @@
+"""job queue, gmail sync cursor and summary cache tables
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 12:02:00.000000
+
+Tables the old `create_all` schema never had. Development databases upgraded
+through an earlier 0001 that already created them are left as they are.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'email_summary_cache' not in existing:
+        op.create_table(
+            'email_summary_cache',
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=False),
+            sa.Column('hits', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('last_used_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('content_hash'),
+        )
+        op.create_index('ix_email_summary_cache_last_used_date', 'email_summary_cache', ['last_used_date'])
+
+    if 'gmail_sync_cursors' not in existing:
+        op.create_table(
+            'gmail_sync_cursors',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('history_id', sa.BigInteger(), nullable=False),
+            sa.Column('updated_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+
+    if 'jobs' not in existing:
+        op.create_table(
+            'jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+            sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('max_attempts', sa.Integer(), server_default='5', nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('run_after', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('locked_at', sa.TIMESTAMP(timezone=True), nullable=True),
+            sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('updated_date', sa.TIMESTAMP(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_jobs_id', 'jobs', ['id'])
+        op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('jobs')
+    op.drop_table('gmail_sync_cursors')
+    op.drop_table('email_summary_cache')
@@ -0,0 +1,45 @@
+"""foreign key and ordering indexes
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 12:05:00.000000
+
+Composite indexes for the per-user list queries, which filter on user_id and
+page by (created_date, id). Built CONCURRENTLY so live tables stay writable,
+which cannot run inside a transaction, hence the autocommit block.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_chats_user_id_created_date_id', 'chats', ['user_id', 'created_date', 'id']),
+    ('ix_goals_user_id_created_date_id', 'goals', ['user_id', 'created_date', 'id']),
+    ('ix_resources_user_id_resource_type_created_date_id', 'resources', ['user_id', 'resource_type', 'created_date', 'id']),
+    ('ix_email_summaries_user_id_created_date_id', 'email_summaries', ['user_id', 'created_date', 'id']),
+    ('ix_emails_user_id', 'emails', ['user_id']),
+    ('ix_google_accounts_user_id', 'google_accounts', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
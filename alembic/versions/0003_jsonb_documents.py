@@ -0,0 +1,64 @@
+"""jsonb documents with gin indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:10:00.000000
+
+Converts the goal, chat and resource documents from JSON to JSONB so they can
+be filtered and projected in Postgres, and indexes them with jsonb_path_ops GIN
+indexes for containment (@>) lookups. The type change rewrites each table under
+an exclusive lock; the indexes are then built CONCURRENTLY.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['goals', 'chats', 'resources']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.alter_column(
+            table, 'data',
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=False,
+            postgresql_using='data::jsonb',
+        )
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f'ix_{table}_data', table, ['data'],
+                postgresql_using='gin',
+                postgresql_ops={'data': 'jsonb_path_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(f'ix_{table}_data', table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    for table in TABLES:
+        op.alter_column(
+            table, 'data',
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=False,
+            postgresql_using='data::json',
+        )
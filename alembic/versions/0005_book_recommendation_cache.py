@@ -0,0 +1,38 @@
+"""book recommendation cache
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_recommendation_cache',
+        sa.Column('topic_key', sa.String(length=200), nullable=False),
+        sa.Column('data', postgresql.JSONB(), nullable=False),
+        sa.Column('hits', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_used_date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('topic_key'),
+    )
+    op.create_index('ix_book_recommendation_cache_last_used_date', 'book_recommendation_cache', ['last_used_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_recommendation_cache')
@@ -0,0 +1,31 @@
+"""chat session summary
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 12:40:00.000000
+
+Rolling summary of the chat turns that no longer fit the prompt budget.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_sessions', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('chat_sessions', sa.Column('summarized_turn_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_sessions', 'summarized_turn_id')
+    op.drop_column('chat_sessions', 'summary')
@@ -0,0 +1,45 @@
+"""google token expiry with time zone
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:50:00.000000
+
+token_expiry was a timestamp without time zone. Rows written by the old code hold
+func.now() in the database session time zone, rows written since hold UTC. The
+column becomes timestamptz; existing values are read in the server's TimeZone
+setting, which is what the old code wrote, so run this before the new code serves
+requests.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'google_accounts', 'token_expiry',
+        type_=sa.TIMESTAMP(timezone=True),
+        existing_type=sa.DateTime(),
+        existing_nullable=False,
+        postgresql_using="token_expiry AT TIME ZONE current_setting('TimeZone')",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'google_accounts', 'token_expiry',
+        type_=sa.DateTime(),
+        existing_type=sa.TIMESTAMP(timezone=True),
+        existing_nullable=False,
+        postgresql_using="token_expiry AT TIME ZONE current_setting('TimeZone')",
+    )
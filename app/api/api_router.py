@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, user, profile, mail, goal, chat, resources
+from app.api.v1.endpoints import auth, user, profile, mail, goal, chat, resources, metrics
 
 router = APIRouter()
 
@@ -12,6 +12,7 @@ router.include_router(mail.router, prefix="/v1/mails", tags=["Mail"])
 router.include_router(goal.router, prefix="/v1/goals", tags=["Goal"])
 router.include_router(chat.router, prefix="/v1/chat", tags=["Chat"])
 router.include_router(resources.router, prefix="/v1/resources", tags=["Resources"])
+router.include_router(metrics.router, prefix="/v1/metrics", tags=["Metrics"])
 # router.include_router(student.router, prefix="/v1/students", tags=["Students"])
 # router.include_router(beneficiary.router, prefix="/v1/beneficiaries", tags=["Beneficiaries"])
 # router.include_router(anganwadi.router, prefix="/v1/anganwadi", tags=["Anganwadi Centers"])
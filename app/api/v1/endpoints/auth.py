@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, status
 from app.core.security import authx_security
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
 from app.db.models.user_model import User
 from app.db.schemas.auth import Token, LoginForm
 from app.core.security import verify_password
@@ -20,15 +20,15 @@ router = APIRouter()
              )
 async def login(
         input_data: LoginForm,
-        session: SessionDep
+        session: AsyncSessionDep
 ):
     statement = select(User).where(User.user_email == input_data.email)
-    user = session.execute(statement).scalar_one_or_none()
+    user = (await session.execute(statement)).scalar_one_or_none()
 
     if user is None:
         raise HTTPException(status_code=400, detail="Email and password does not match!")
 
-    if not verify_password(input_data.password, user.user_hashed_password):
+    if not await verify_password(input_data.password, user.user_hashed_password):
         raise HTTPException(status_code=400, detail="Email and password does not match!")
 
     # Used 'user_in_db.user_role.value' to get the actual string value from the Enum
@@ -47,7 +47,7 @@ async def login(
             # response_model=Token
             )
 async def login_with_google(
-        session: SessionDep
+        session: AsyncSessionDep
 ):
     params = {
         "client_id": settings.GOOGLE_CLIENT_ID,
@@ -65,16 +65,18 @@ async def login_with_google(
 @router.get("/google/callback")
 async def google_callback(
         code: str,
-        session: SessionDep
+        session: AsyncSessionDep
 ):
     try:
-        tokens = exchange_code_for_tokens(code)
-        google_user_info = verify_id_token(tokens.get("id_token"))
-        saved_account = save_oauth_tokens(google_user_info, tokens, session)
+        tokens = await exchange_code_for_tokens(code)
+        google_user_info = await verify_id_token(tokens.get("id_token"))
+        saved_account = await save_oauth_tokens(google_user_info, tokens, session)
 
         try:
             topic_name = "projects/sikshasathi/topics/gmail-notifications"
-            response = mail_service.start_gmail_watch(tokens["access_token"], topic_name)
+            response = await mail_service.start_gmail_watch(tokens["access_token"], topic_name)
+            # Changes after this historyId are ingested by the webhook worker
+            await mail_service.save_gmail_sync_cursor(saved_account.get("user_id"), response["historyId"], session)
         except Exception as e:
             print("Error starting Gmail watch:", e)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to start Gmail watch")
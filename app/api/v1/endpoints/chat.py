@@ -1,52 +1,51 @@
-from app.db.schemas.chat import ChatForm, ChatCreate
-from app.core.ai import AI_Client
+from app.db.schemas.chat import ChatForm, ChatCreate, ChatSessionCreate, ChatTurnForm
+from app.core import ai
 from app.db.models import chat_model
 from app.core.config import settings
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse
 from authx import TokenPayload
 import httpx, base64, json
-from app.db.session import SessionDep
-from app.core.security import authx_security, auth_scheme
+from app.db.session import AsyncSessionDep
+from app.services.pagination import PageDep
+from app.core.security import CurrentUser
 from app.services import mail_service, user_service
-from app.services import profile_service, chat_service
+from app.services import profile_service, chat_service, chat_context_service
+from app.services.semantic_cache_service import public_chat_cache
+from fastapi.responses import StreamingResponse
 
 router = APIRouter()
 
+# Proxies (nginx) must pass every event through as it is sent instead of buffering the response
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
 
-@router.get("/",
-     dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-     )
-async def get_ai_chats(
-        session: SessionDep,
-        payload: TokenPayload = Depends(authx_security.access_token_required),
-):
-    chats = chat_service.list_user_chats(payload.user_id, session=session)
-    if not chats:
-        # Return 404 if not found
-        raise HTTPException(status_code=404, detail="Chats not found")
-
-    return {'data': chats}
+def build_user_system_prompt(chat_context: str, user_context: str) -> str:
+    return f"""
+    You are Siksha Sathi AI, a smart study assistant. Your goal is to help the user (always referred to as 'You') plan, learn, and revise their study topics efficiently. Always break complex topics into simple, step-by-step explanations that a beginner can understand. Give study plans, summaries, examples, and exercises where appropriate. 
 
+    Contex / Data:
+    - Chat history for contex: {chat_context}
+    - User details: {user_context}
+    
+    Guidelines:
+    - Always use simple, clear English.
+    - Always refer to the recipient as 'You'.
+    - Include actionable tips like "Read this first", "Then practice", "Revise daily".
+    - When providing multiple steps, number or bullet them clearly.
+    - Never include anything unrelated to studying or the topic.
+    - Always be encouraging and motivational.
+    - Do not use Markdown formatting.
+    """
 
-@router.post("/",
-     dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-     )
-async def chat_with_ai(
-        input_data: ChatForm,
-        session: SessionDep,
-        payload: TokenPayload = Depends(authx_security.access_token_required),
-):
-    user = user_service.get_user(payload.user_id, session)
-    profile = profile_service.get_profile_by_user_id(payload.user_id, session)
 
-    system_prompt = f"""
+def build_public_system_prompt(chat_context: str) -> str:
+    return f"""
     You are Siksha Sathi AI, a smart study assistant. Your goal is to help the user (always referred to as 'You') plan, learn, and revise their study topics efficiently. Always break complex topics into simple, step-by-step explanations that a beginner can understand. Give study plans, summaries, examples, and exercises where appropriate. 
 
     Contex / Data:
-    - Chat history for contex: {input_data.chat_history}
-    - User details: { user.__dict__ } and {profile.__dict__}
-    
+    - Chat history for contex: {chat_context}
+
     Guidelines:
     - Always use simple, clear English.
     - Always refer to the recipient as 'You'.
@@ -57,6 +56,93 @@ async def chat_with_ai(
     - Do not use Markdown formatting.
     """
 
+
+def build_chat_prompt(chat_history, user=None, profile=None, public: bool = False) -> str:
+    """
+    System prompt with the history fitted into the token budget, see chat_context_service.
+    """
+    chat_context, _, _ = chat_context_service.build_chat_context(chat_history)
+    if public:
+        return build_public_system_prompt(chat_context)
+    return build_user_system_prompt(chat_context, chat_context_service.build_user_context(user, profile))
+
+
+async def chat_event_generator(system_prompt: str, input_data: ChatForm, cache=None):
+    """
+    Stream the completion as Server-Sent Events.
+    Every token is sent as a `data:` event, the final `done` event carries the
+    updated chat_history in the same shape as the non streaming endpoints.
+    With a cache, a cached answer is sent as a single token and new answers are stored.
+    """
+    cached = cache.get(input_data.query) if cache else None
+
+    messages = [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": input_data.query,
+        },
+    ]
+
+    tokens = []
+    if cached is not None:
+        tokens.append(cached)
+        yield f"data: {json.dumps({'token': cached})}\n\n"
+    else:
+        try:
+            async for token in ai.stream_chat_completion(messages):
+                tokens.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            print("Error streaming chat completion:", e)
+            yield f"event: error\ndata: {json.dumps({'detail': 'Chat completion failed'})}\n\n"
+            return
+        if cache:
+            cache.set(input_data.query, "".join(tokens))
+
+    history_list = input_data.chat_history.copy() if input_data.chat_history else []
+    history_list.append({
+        "system": "".join(tokens),
+        "user": input_data.query
+    })
+
+    result = {
+        "chat_history": history_list,
+        "query": input_data.query,
+        "save_chat": False
+    }
+    yield f"event: done\ndata: {json.dumps(result)}\n\n"
+
+
+
+@router.get("/")
+async def get_ai_chats(
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+        page: PageDep,
+):
+    chats, next_cursor = await chat_service.list_user_chats(payload.user_id, page, session=session)
+    if not chats:
+        # Return 404 if not found
+        raise HTTPException(status_code=404, detail="Chats not found")
+
+    return ORJSONResponse({'data': chats, 'next_cursor': next_cursor})
+
+
+@router.post("/")
+async def chat_with_ai(
+        input_data: ChatForm,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+):
+    user = await user_service.get_user(payload.user_id, session)
+    profile = await profile_service.get_profile_by_user_id(payload.user_id, session)
+
+    system_prompt = build_chat_prompt(input_data.chat_history, user, profile)
+
     if input_data.save_chat:
         chat_data = {
             "chat_history": json.loads(input_data.chat_history) if isinstance(input_data.chat_history,
@@ -84,8 +170,8 @@ async def chat_with_ai(
             # Save to database
             new_chat = chat_model.Chat(**validated_chat.model_dump())
             session.add(new_chat)
-            session.commit()
-            session.refresh(new_chat)
+            await session.commit()
+            await session.refresh(new_chat)
 
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Chat Data is not valid JSON")
@@ -97,8 +183,9 @@ async def chat_with_ai(
         return {"message": "Chat save successful"}
 
 
-
-    chat_completion = AI_Client.chat.completions.create(
+    # End the read transaction, the pooled connection is not held while the LLM answers
+    await session.commit()
+    response = await ai.chat_completion(
         messages=[
             {
                 "role": "system",
@@ -109,12 +196,11 @@ async def chat_with_ai(
                 "content": input_data.query,
             },
         ],
-        model="llama-3.1-8b-instant",
     )
 
     history_list = input_data.chat_history.copy() if input_data.chat_history else []
     history_list.append({
-        "system": chat_completion.choices[0].message.content,
+        "system": response,
         "user": input_data.query
     })
 
@@ -125,45 +211,169 @@ async def chat_with_ai(
     }
 
 
-@router.get("/",
-            dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-            )
+@router.get("/")
 async def get_ai_chats_history(
-        session: SessionDep,
-        payload: TokenPayload = Depends(authx_security.access_token_required),
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+        page: PageDep,
 ):
-    chats = chat_service.list_user_chats(payload.user_id, session=session)
+    chats, next_cursor = await chat_service.list_user_chats(payload.user_id, page, session=session)
     if not chats:
         # Return 404 if not found
         raise HTTPException(status_code=404, detail="Chats not found")
 
-    return {'data': chats}
+    return ORJSONResponse({'data': chats, 'next_cursor': next_cursor})
 
 
 @router.post("/public"
              )
 async def chat_with_public_ai(
         input_data: ChatForm,
-        session: SessionDep,
+        session: AsyncSessionDep,
 ):
 
-    system_prompt = f"""
-    You are Siksha Sathi AI, a smart study assistant. Your goal is to help the user (always referred to as 'You') plan, learn, and revise their study topics efficiently. Always break complex topics into simple, step-by-step explanations that a beginner can understand. Give study plans, summaries, examples, and exercises where appropriate. 
+    system_prompt = build_chat_prompt(input_data.chat_history, public=True)
+
+    # Only a first question is answered the same for everyone
+    use_cache = not input_data.chat_history
+    response = public_chat_cache.get(input_data.query) if use_cache else None
+
+    if response is None:
+        response = await ai.chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt,
+                },
+                {
+                    "role": "user",
+                    "content": input_data.query,
+                },
+            ],
+        )
+        if use_cache:
+            public_chat_cache.set(input_data.query, response)
 
-    Contex / Data:
-    - Chat history for contex: {input_data.chat_history}
+    history_list = input_data.chat_history.copy() if input_data.chat_history else []
+    history_list.append({
+        "system": response,
+        "user": input_data.query
+    })
 
-    Guidelines:
-    - Always use simple, clear English.
-    - Always refer to the recipient as 'You'.
-    - Include actionable tips like "Read this first", "Then practice", "Revise daily".
-    - When providing multiple steps, number or bullet them clearly.
-    - Never include anything unrelated to studying or the topic.
-    - Always be encouraging and motivational.
-    - Do not use Markdown formatting.
+    return {
+        "chat_history": history_list,
+        "query": input_data.query,
+        "save_chat": False
+    }
+
+
+@router.post("/stream")
+async def stream_chat_with_ai(
+        input_data: ChatForm,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+):
+    """
+    Streaming variant of POST /v1/chat/ (SSE). Saving a chat streams nothing, use POST /v1/chat/ for it.
+    """
+    if input_data.save_chat:
+        raise HTTPException(status_code=400, detail="save_chat is not supported when streaming, use POST /v1/chat/")
+
+    user = await user_service.get_user(payload.user_id, session)
+    profile = await profile_service.get_profile_by_user_id(payload.user_id, session)
+
+    system_prompt = build_chat_prompt(input_data.chat_history, user, profile)
+    # The stream needs no database, give the connection back to the pool before it starts
+    await session.close()
+
+    return StreamingResponse(
+        chat_event_generator(system_prompt, input_data),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/public/stream"
+             )
+async def stream_chat_with_public_ai(
+        input_data: ChatForm,
+):
+    """
+    Streaming variant of POST /v1/chat/public (SSE).
+    """
+    system_prompt = build_chat_prompt(input_data.chat_history, public=True)
+    cache = public_chat_cache if not input_data.chat_history else None
+
+    return StreamingResponse(
+        chat_event_generator(system_prompt, input_data, cache),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/sessions", status_code=status.HTTP_201_CREATED)
+async def create_chat_session(
+        input_data: ChatSessionCreate,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+):
+    chat_session = await chat_service.create_chat_session(payload.user_id, input_data.title, session)
+    return {'data': chat_session}
+
+
+@router.get("/sessions")
+async def get_chat_sessions(
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+        page: PageDep,
+):
+    chat_sessions, next_cursor = await chat_service.list_user_chat_sessions(payload.user_id, page, session=session)
+    if not chat_sessions:
+        # Return 404 if not found
+        raise HTTPException(status_code=404, detail="Chat sessions not found")
+
+    return ORJSONResponse({'data': chat_sessions, 'next_cursor': next_cursor})
+
+
+@router.get("/sessions/{chat_session_id}/turns")
+async def get_chat_session_turns(
+        chat_session_id: int,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+        page: PageDep,
+):
+    """
+    Turns of the session, newest first.
+    """
+    await chat_service.get_user_chat_session(chat_session_id, payload.user_id, session)
+
+    turns, next_cursor = await chat_service.list_chat_turns(chat_session_id, page, session=session)
+    return ORJSONResponse({'data': turns, 'next_cursor': next_cursor})
+
+
+@router.post("/sessions/{chat_session_id}/turns")
+async def chat_in_session(
+        chat_session_id: int,
+        input_data: ChatTurnForm,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+):
+    """
+    Ask the next question of a session, the history is read from the database
+    and the new turn is appended to it.
     """
+    chat_session = await chat_service.get_user_chat_session(chat_session_id, payload.user_id, session)
+    chat_history = await chat_service.get_unsummarized_chat_history(chat_session, session)
 
-    chat_completion = AI_Client.chat.completions.create(
+    user = await user_service.get_user(payload.user_id, session)
+    profile = await profile_service.get_profile_by_user_id(payload.user_id, session)
+
+    chat_context, summary, folded_turns = chat_context_service.build_chat_context(chat_history, chat_session.summary)
+    system_prompt = build_user_system_prompt(chat_context, chat_context_service.build_user_context(user, profile))
+
+    # End the read transaction, the pooled connection is not held while the LLM answers
+    await session.commit()
+    response = await ai.chat_completion(
         messages=[
             {
                 "role": "system",
@@ -174,17 +384,42 @@ async def chat_with_public_ai(
                 "content": input_data.query,
             },
         ],
-        model="llama-3.1-8b-instant",
     )
 
-    history_list = input_data.chat_history.copy() if input_data.chat_history else []
-    history_list.append({
-        "system": chat_completion.choices[0].message.content,
-        "user": input_data.query
-    })
+    try:
+        new_turn = await chat_service.append_chat_turn(
+            chat_session,
+            input_data.query,
+            response,
+            session,
+            summary=summary,
+            summarized_turn_id=folded_turns[-1]["id"] if folded_turns else None,
+        )
+    except Exception as e:
+        print(e)
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Something went wrong!")
+
+    return {'data': new_turn}
+
+
+@router.delete("/sessions/{chat_session_id}")
+async def delete_chat_session(
+        chat_session_id: int,
+        session: AsyncSessionDep,
+        payload: CurrentUser,
+):
+    chat_session = await chat_service.get_user_chat_session(chat_session_id, payload.user_id, session)
+
+    try:
+        await session.delete(chat_session)
+        await session.commit()
+    except Exception as e:
+        print("Delete error:", e)
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Failed to delete chat session!")
 
     return {
-        "chat_history": history_list,
-        "query": input_data.query,
-        "save_chat": False
-    }
\ No newline at end of file
+        "message": "Chat session deleted successfully",
+        "deleted_id": chat_session_id
+    }
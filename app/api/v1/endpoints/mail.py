@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse
 from authx import TokenPayload
 import httpx, base64, json
-from app.db.session import SessionDep
-from app.core.security import authx_security, auth_scheme
+from app.db.session import AsyncSessionDep
+from app.services.pagination import PageDep
+from app.core.security import CurrentUser
 from app.services.google_account_service import fetch_user_gmail_messages, get_user_google_account
 from app.services.google_account_service import get_valid_google_access_token
 from app.services import mail_service, user_service
 from app.db.models.email_summary_model import EmailSummary
-from app.services import EmailSummary_service
+from app.services import EmailSummary_service, job_service
 from app.db.schemas.EmailSummary import EmailSummariesPublic
 
 
@@ -18,14 +20,11 @@ import datetime
 
 router = APIRouter()
 
-@router.get(
-    "/me",
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-)
+@router.get("/me")
 async def get_user_gmail_message_ids(
-    session: SessionDep,
+    session: AsyncSessionDep,
+    payload: CurrentUser,
     max_results: int = Query(10, description="Number of emails to fetch"),
-    payload: TokenPayload = Depends(authx_security.access_token_required),
 ):
     """
     Fetch Gmail messages for a specific user.
@@ -37,9 +36,9 @@ async def get_user_gmail_message_ids(
     try:
 
         # Fetch valid access token (refresh if needed)
-        access_token = get_valid_google_access_token(payload.user_id, session)
+        access_token = await get_valid_google_access_token(payload.user_id, session)
 
-        result = fetch_user_gmail_messages(access_token, max_results)
+        result = await fetch_user_gmail_messages(access_token, max_results)
         return {
             "success": True,
             "message": "Fetched Gmail messages successfully",
@@ -56,13 +55,10 @@ async def get_user_gmail_message_ids(
 
 
 
-@router.post(
-    "/gmail/watch",
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-)
+@router.post("/gmail/watch")
 async def start_user_gmail_watcher(
-    session: SessionDep,
-    payload = Depends(authx_security.access_token_required)
+    session: AsyncSessionDep,
+    payload: CurrentUser
 ):
     """
     Start Gmail push notifications for a user.
@@ -70,14 +66,16 @@ async def start_user_gmail_watcher(
     """
 
     # Fetch valid access token (refresh if needed)
-    access_token = get_valid_google_access_token(payload.user_id, session)
+    access_token = await get_valid_google_access_token(payload.user_id, session)
     if not access_token:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No valid access token found")
 
     topic_name = "projects/sikshasathi/topics/gmail-notifications"
 
     try:
-        response = mail_service.start_gmail_watch(access_token, topic_name)
+        response = await mail_service.start_gmail_watch(access_token, topic_name)
+        # Changes after this historyId are ingested by the webhook worker
+        await mail_service.save_gmail_sync_cursor(payload.user_id, response["historyId"], session)
         return {
             "success": True,
             "message": "Gmail watch started successfully",
@@ -92,77 +90,62 @@ async def start_user_gmail_watcher(
 @router.post("/gmail/webhook")
 async def gmail_webhook(
     request: Request,
-    session: SessionDep
+    session: AsyncSessionDep
 ):
     """
     Receives Gmail notifications (callback) when a new email arrives.
     Gmail Pub/Sub will call this endpoint.
+    The notification is only queued here, the worker (app/worker.py) fetches,
+    saves and summarizes the mail, so Pub/Sub gets its ack right away.
     """
+    # A malformed push is acked with 200, Pub/Sub would only redeliver the same bad message
     try:
         envelope = await request.json()
         message = envelope.get("message", {})
         data_b64 = message.get("data")
 
         if not data_b64:
-            raise HTTPException(status_code=400, detail="No message data")
+            raise ValueError("No message data")
 
         payload = json.loads(base64.b64decode(data_b64).decode("utf-8"))
         email_address = payload.get("emailAddress")
         history_id = payload.get("historyId")
 
-        print("Gmail callback received:", payload)
-
         if not email_address or not history_id:
-            raise HTTPException(status_code=400, detail="Missing emailAddress or historyId")
-
-        user = user_service.get_user_by_email(email_address, session)
-        # Get valid (refreshed if needed) access token for this user
-        access_token = get_valid_google_access_token(user.get("user_id"), session)
-        if not access_token:
-            raise HTTPException(status_code=404, detail="No linked Google account found")
-
-        # Fetch new emails
-        latest_message_id = mail_service.fetch_user_gmail_latest_message_id(access_token)
-
-        latest_mail = mail_service.fetch_gmail_message(access_token, latest_message_id)
-        print("New emails fetched:", latest_mail)
-
-        mail_duplicate = mail_service.get_email_by_message_id(latest_message_id, session)
-        if mail_duplicate:
-            return {"success": True}
-        mail_service.save_gmail(user.get("user_id"), latest_mail, session)
-
-        summary_duplicate = EmailSummary_service.get_summary_by_message_id(latest_message_id, session)
-        if summary_duplicate:
-            return {"success": True}
-        summary = EmailSummary_service.generate_mail_summary(latest_mail, session)
-
-        summary_in_db = EmailSummary_service.save_mail_summary(user.get("user_id"), latest_mail["id"], summary, session)
-
-        return {"success": True}
-
+            raise ValueError("Missing emailAddress or historyId")
     except Exception as e:
-        print("Error in Gmail webhook:", e)
+        print("Malformed Gmail webhook:", e)
         raise HTTPException(status_code=200, detail=f"Webhook processing failed: {e}")
 
+    # Not acked when the job cannot be stored, so Pub/Sub redelivers the notification
+    try:
+        await job_service.enqueue_job(
+            "gmail_notification",
+            {"emailAddress": email_address, "historyId": history_id},
+            session,
+        )
+    except Exception as e:
+        print("Error queueing Gmail notification:", e)
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to queue notification")
 
+    return {"success": True}
 
-@router.get(
-    "/message/{message_id}",
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
-)
+
+
+@router.get("/message/{message_id}")
 async def get_user_gmail_full_message(
-    session: SessionDep,
+    session: AsyncSessionDep,
     message_id: str,
-    payload: TokenPayload = Depends(authx_security.access_token_required),
+    payload: CurrentUser,
 ):
 
-    google_access_token = get_valid_google_access_token(payload.user_id, session)
+    google_access_token = await get_valid_google_access_token(payload.user_id, session)
 
     if not google_access_token:
         raise HTTPException(status_code=404, detail="No linked Google account found")
 
-    message = mail_service.fetch_gmail_message(google_access_token, message_id)
+    message = await mail_service.fetch_gmail_message(google_access_token, message_id)
 
     return message
 
@@ -171,49 +154,48 @@ async def get_user_gmail_full_message(
 @router.get(
     "/summary",
     # response_model = EmailSummariesPublic,
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
 )
 async def get_user_gmail_summaries(
-    session: SessionDep,
-    payload: TokenPayload = Depends(authx_security.access_token_required),
+    session: AsyncSessionDep,
+    payload: CurrentUser,
+    page: PageDep,
 ):
 
-    google_access_token = get_valid_google_access_token(payload.user_id, session)
+    google_access_token = await get_valid_google_access_token(payload.user_id, session)
 
     if not google_access_token:
         raise HTTPException(status_code=404, detail="No linked Google account found")
 
     # print(payload)
-    summaries = EmailSummary_service.list_summary_by_user_id(payload.user_id, session)
+    summaries, next_cursor = await EmailSummary_service.list_summary_by_user_id(payload.user_id, page, session)
 
     # if not summaries:
     #     raise HTTPException(status_code=404, detail="No email summaries found for this user")
 
-    return {'data': summaries}
+    return ORJSONResponse({'data': summaries, 'next_cursor': next_cursor})
 
 
 
 @router.delete(
     "/summary/{summary_id}",
     # response_model = EmailSummariesPublic,
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)],
 )
 async def delete_mail_summary(
     summary_id: int,
-    session: SessionDep,
-    payload: TokenPayload = Depends(authx_security.access_token_required),
+    session: AsyncSessionDep,
+    payload: CurrentUser,
 ):
-    summary_in_db = session.get(EmailSummary, summary_id)
+    summary_in_db = await session.get(EmailSummary, summary_id)
 
     if summary_in_db.user_id != payload.user_id:
         raise HTTPException(status_code=400, detail="Does not have permission to delete mail summary!")
 
     try:
-        session.delete(summary_in_db)
-        session.commit()
+        await session.delete(summary_in_db)
+        await session.commit()
     except Exception as e:
         print("Delete error:", e)
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Failed to delete email summary!")
 
     return {
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, status
+from app.core.config import settings
+from app.core.security import CurrentUser
+from app.db.database import engine, async_engine
+from app.db.pool import pool_status
+from app.services.semantic_cache_service import public_chat_cache
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(
+    payload: CurrentUser,
+):
+    """
+    Connection pool usage of this worker.
+    Total connections opened by a deployment is at most
+    workers x engines x (pool_size + max_overflow).
+    """
+    if not payload.user_is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view metrics")
+
+    return {
+        "async": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+    }
+
+
+@router.get("/public-chat-cache")
+async def get_public_chat_cache_metrics(
+    payload: CurrentUser,
+):
+    """
+    Semantic cache of public chat answers in this worker.
+    """
+    if not payload.user_is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view metrics")
+
+    return public_chat_cache.stats()
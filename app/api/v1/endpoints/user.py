@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.core.security import authx_security, auth_scheme
+from fastapi.responses import ORJSONResponse
+from app.core.security import CurrentUser
 from authx import TokenPayload
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
+from app.services.pagination import PageDep
 from app.db.schemas.user import User, UserCreate, UserPublic, UsersPublic
 from app.core.security import hash_password
 from app.db.models import user_model
@@ -14,24 +16,27 @@ router = APIRouter()
 )
 async def create_user(
     input_data: UserCreate,
-    session: SessionDep
+    session: AsyncSessionDep
 ):
-    user = user_service.get_user_by_email(input_data.user_email, session)
+    user = await user_service.get_user_by_email(input_data.user_email, session)
     if user:
         raise HTTPException(status_code=400, detail="Email Already exists!")
 
+    # Outside the try, a busy password pool must surface as 503
+    hashed_password = await hash_password(input_data.user_password)
+
     try:
 
         validated_user = User(
             **input_data.model_dump(),
-            user_hashed_password=hash_password(input_data.user_password),
+            user_hashed_password=hashed_password,
         )
 
         new_user = user_model.User(**validated_user.model_dump())
 
         session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
+        await session.commit()
+        await session.refresh(new_user)
     except Exception as e:
         print(e)
         raise HTTPException(status_code=400, detail="Something went wrong!")
@@ -43,36 +48,35 @@ async def create_user(
 
 @router.get("/",
     response_model = UsersPublic,
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)]
 )
 async def list_users(
-    session: SessionDep,
-    payload: TokenPayload = Depends(authx_security.access_token_required)
+    session: AsyncSessionDep,
+    payload: CurrentUser,
+    page: PageDep,
 ):
 
     if not payload.user_is_admin:
         raise HTTPException(status_code=400, detail="Does not have permission to get user!")
 
-    users = user_service.list_users(session=session)
+    users, next_cursor = await user_service.list_users(page, session=session)
 
     if not users:
         # Return 404 if not found
         raise HTTPException(status_code=404, detail="User not found")
 
-    return {'data': users}
+    return ORJSONResponse({'data': users, 'next_cursor': next_cursor})
 
 
 
 @router.get("/self",
     response_model = UserPublic,
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)]
 )
 async def get_my_account(
-    session: SessionDep,
-    payload: TokenPayload = Depends(authx_security.access_token_required)
+    session: AsyncSessionDep,
+    payload: CurrentUser
 ):
 
-    user = user_service.get_user(user_id=payload.user_id, session=session)
+    user = await user_service.get_user(user_id=payload.user_id, session=session)
 
     if not user:
         # Return 404 if not found
@@ -84,18 +88,17 @@ async def get_my_account(
 
 @router.get("/{user_id}",
     response_model = UserPublic,
-    dependencies=[Depends(authx_security.access_token_required), Depends(auth_scheme)]
 )
 async def get_user(
     user_id: int,
-    session: SessionDep,
-    payload: TokenPayload = Depends(authx_security.access_token_required)
+    session: AsyncSessionDep,
+    payload: CurrentUser
 ):
 
-    if not payload.user_admin:
+    if not payload.user_is_admin:
         raise HTTPException(status_code=400, detail="Does not have permission to get user!")
 
-    user = user_service.get_user(user_id=user_id, session=session)
+    user = await user_service.get_user(user_id=user_id, session=session)
 
     if not user:
         # Return 404 if not found
@@ -1,7 +1,126 @@
+import asyncio
+import hashlib
+import json
+import math
+import httpx
 from app.core.config import settings
 
-from groq import Groq
+from groq import AsyncGroq
 
-AI_Client = Groq(
+# Single pooled async HTTP client shared by every LLM call on this worker.
+# Retries with exponential backoff (429, 5xx, connection errors) are done by the Groq SDK.
+AI_Client = AsyncGroq(
     api_key=settings.GROQ_API,
-)
\ No newline at end of file
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+        ),
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+    ),
+)
+
+# Rough chars per token for English text with the llama tokenizer, good enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+# Bounds the number of completions in flight, extra callers wait for a free slot.
+llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+# Coalesced completions running on this worker, keyed by completion_key
+inflight_completions: dict[str, asyncio.Task] = {}
+
+
+def completion_key(messages: list[dict], model: str, coalesce_key: str = None, **kwargs) -> str:
+    """
+    Hash of the model, the options and either the caller's coalesce_key or the
+    whitespace collapsed messages.
+    """
+    if coalesce_key is None:
+        prompt = [[message["role"], " ".join(str(message["content"]).split())] for message in messages]
+    else:
+        prompt = coalesce_key
+    raw = json.dumps([model, prompt, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def chat_completion(
+    messages: list[dict],
+    model: str = None,
+    timeout: float = None,
+    coalesce: bool = False,
+    coalesce_key: str = None,
+    **kwargs,
+) -> str:
+    """
+    Run a chat completion without blocking the event loop.
+    Returns the content of the first choice.
+    With coalesce (or a coalesce_key) concurrent identical requests share one
+    upstream completion instead of each starting their own.
+    """
+    if not coalesce and coalesce_key is None:
+        return await create_chat_completion(messages, model, timeout, **kwargs)
+
+    key = completion_key(messages, model or settings.LLM_MODEL, coalesce_key, **kwargs)
+    task = inflight_completions.get(key)
+    if task is None:
+        task = asyncio.create_task(create_chat_completion(messages, model, timeout, **kwargs))
+        inflight_completions[key] = task
+        task.add_done_callback(lambda _: inflight_completions.pop(key, None))
+
+    # Shielded so a caller that disconnects does not cancel the completion for the others
+    return await asyncio.shield(task)
+
+
+async def create_chat_completion(messages: list[dict], model: str = None, timeout: float = None, **kwargs) -> str:
+    async with llm_semaphore:
+        completion = await AI_Client.chat.completions.create(
+            messages=messages,
+            model=model or settings.LLM_MODEL,
+            timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+            **kwargs,
+        )
+
+    return completion.choices[0].message.content
+
+
+async def stream_chat_completion(messages: list[dict], model: str = None, timeout: float = None, **kwargs):
+    """
+    Async generator yielding content tokens as the model emits them.
+    The concurrency slot is held until the stream is exhausted or closed.
+    """
+    async with llm_semaphore:
+        stream = await AI_Client.chat.completions.create(
+            messages=messages,
+            model=model or settings.LLM_MODEL,
+            timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+            stream=True,
+            **kwargs,
+        )
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                yield token
+
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate used for prompt budgeting.
+    """
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to roughly max_tokens, on a word boundary.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + " ..."
@@ -9,9 +9,45 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int
     POSTGRES_DB: str
 
+    # Connection pool, sized per uvicorn worker (sync and async engine each get one)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+
     GEMINI_API: str
     GROQ_API: str
 
+    # LLM gateway
+    LLM_MODEL: str = "llama-3.1-8b-instant"
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_MAX_RETRIES: int = 3
+
+    # Email summary cache, shared across users
+    SUMMARY_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    SUMMARY_CACHE_MAX_ENTRIES: int = 50000
+    SUMMARY_CACHE_MEMORY_ENTRIES: int = 2048
+    # How often memory cache hits are written back and the cache tables are pruned
+    CACHE_MAINTENANCE_INTERVAL_SECONDS: int = 300
+    # Book recommendations shared across users, keyed by normalized topic
+    BOOK_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    BOOK_CACHE_MAX_ENTRIES: int = 5000
+    BOOK_CACHE_MEMORY_ENTRIES: int = 512
+    # Max email body size sent for summarization
+    EMAIL_SUMMARY_TOKEN_BUDGET: int = 1500
+    # Semantic cache of public chat answers, memory is about MAX_ENTRIES x DIM x 4 bytes per process
+    PUBLIC_CHAT_CACHE_MAX_ENTRIES: int = 5000
+    PUBLIC_CHAT_CACHE_THRESHOLD: float = 0.95
+    PUBLIC_CHAT_CACHE_DIM: int = 512
+    # Chat prompt budgets in estimated tokens: recent turns verbatim, older ones in a rolling summary
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 3000
+    CHAT_TURN_TOKEN_LIMIT: int = 1000
+    CHAT_SUMMARY_TOKEN_BUDGET: int = 500
+
     GOOGLE_CLIENT_ID: str
     GOOGLE_PROJECT_ID: str
     GOOGLE_AUTH_URI: str
@@ -20,14 +56,56 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     REDIRECT_URI: str
     YT_API: str
+    # YouTube search caches, stale results are only served while the daily quota is spent
+    YT_CACHE_MAX_ENTRIES: int = 2048
+    YT_QUERY_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    YT_SEARCH_CACHE_TTL_SECONDS: int = 6 * 3600
+    YT_SEARCH_STALE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Pause after a per-second / per-100-second rate limit when there is no Retry-After
+    YT_RATE_LIMIT_BACKOFF_SECONDS: int = 10
+
+    # Shared HTTP client for Google APIs
+    GOOGLE_HTTP_TIMEOUT_SECONDS: float = 10.0
+    GOOGLE_HTTP_MAX_CONNECTIONS: int = 50
+    GMAIL_FETCH_CONCURRENCY: int = 10
+    # Background refresh of cached Google access tokens
+    GOOGLE_TOKEN_REFRESH_AHEAD_SECONDS: int = 300
+    GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS: int = 60
+    GOOGLE_TOKEN_CACHE_SIZE: int = 10000
+    # Only tokens used within this window are refreshed ahead of expiry
+    GOOGLE_TOKEN_ACTIVE_WINDOW_SECONDS: int = 3600
 
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Background jobs (see app/worker.py)
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: int = 30
+    JOB_RETRY_BACKOFF_MAX_SECONDS: int = 3600
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600
+    WORKER_CONCURRENCY: int = 4
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    # Goal generation jobs, an LLM failure is retried a few times at most
+    GOAL_JOB_MAX_ATTEMPTS: int = 3
+    GOAL_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    GOAL_JOB_STREAM_TIMEOUT_SECONDS: int = 300
+
     #JWT Signing keys
     JWT_PRIVATE: str
     JWT_PUBLIC: str
+    # Recently verified access tokens kept in memory
+    JWT_VERIFIED_CACHE_SIZE: int = 4096
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,12 @@
+import httpx
+from app.core.config import settings
+
+# Keep-alive client shared by every call to Google APIs (Gmail, OAuth, YouTube),
+# so requests reuse pooled TLS connections instead of opening a new one each time.
+google_client = httpx.AsyncClient(
+    timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS,
+    limits=httpx.Limits(
+        max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+    ),
+)
@@ -1,8 +1,14 @@
-from authx import AuthX, AuthXConfig
+from authx import AuthX, AuthXConfig, RequestToken, TokenPayload
 from app.core.config import settings
 import bcrypt
-from fastapi.security import HTTPBearer
-from datetime import timedelta
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+from cachetools import TLRUCache
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from datetime import timedelta, datetime
 
 security_config = AuthXConfig(
     JWT_ALGORITHM = "RS256",
@@ -25,15 +31,81 @@ In: header
 
 authx_security = AuthX(config=security_config)
 
-# Hash a password using bcrypt
-def hash_password(password) -> str:
+
+def token_expiry(token: str, payload: TokenPayload, now: float) -> float:
+    """
+    Cache entries live until the token's own exp.
+    """
+    if isinstance(payload.exp, datetime):
+        return payload.exp.timestamp()
+    if payload.exp is None:
+        return now
+    return float(payload.exp)
+
+# token -> verified payload, bounded LRU, entries expire with the token
+verified_tokens = TLRUCache(maxsize=settings.JWT_VERIFIED_CACHE_SIZE, ttu=token_expiry, timer=time.time)
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
+) -> TokenPayload:
+    """
+    Verify the bearer access token once per request, exposes user_id and user_is_admin.
+    Repeated requests with the same token skip the RS256 signature check.
+    Async on purpose, so the cache is only touched from the event loop.
+    """
+    token = credentials.credentials
+
+    payload = verified_tokens.get(token)
+    if payload is None:
+        payload = authx_security.verify_token(
+            RequestToken(token=token, location="headers", type="access"),
+            verify_type=True,
+            verify_fresh=False,
+            verify_csrf=False,
+        )
+        verified_tokens[token] = payload
+
+    return payload
+
+CurrentUser = Annotated[TokenPayload, Depends(get_current_user)]
+
+# bcrypt is CPU bound (~250 ms at 12 rounds) and releases the GIL,
+# so it runs on a small dedicated pool instead of the event loop.
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+# Running + queued password jobs, callers beyond that wait up to the queue timeout and then get a 503.
+password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
+async def run_password_job(func, *args):
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "5"})
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        password_slots.release()
+
+
+def bcrypt_hash(password: str) -> str:
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
     return hashed_password.decode('utf-8')
 
-# Check if the provided password matches the stored hashed_password
-def verify_password(plain_password, hashed_password) -> bool:
+
+def bcrypt_check(plain_password: str, hashed_password: str) -> bool:
     password_byte_enc = plain_password.encode('utf-8')
     hashed_password_byte_enc = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password = password_byte_enc , hashed_password = hashed_password_byte_enc)
\ No newline at end of file
+    return bcrypt.checkpw(password = password_byte_enc , hashed_password = hashed_password_byte_enc)
+
+
+# Hash a password using bcrypt
+async def hash_password(password) -> str:
+    return await run_password_job(bcrypt_hash, password)
+
+# Check if the provided password matches the stored hashed_password
+async def verify_password(plain_password, hashed_password) -> bool:
+    return await run_password_job(bcrypt_check, plain_password, hashed_password)
@@ -1,16 +1,40 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
+from app.db.pool import MeteredQueuePool, MeteredAsyncQueuePool
 from sqlalchemy.orm import DeclarativeBase
 
+pool_options = dict(
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# Sync engine, used by Alembic, start up checks and scripts.
 DATABASE_URL = settings.SQLALCHEMY_DATABASE_URI
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=MeteredQueuePool,
+    connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+    **pool_options,
+)
+
+# Async engine, used by the API request handlers.
+ASYNC_DATABASE_URL = settings.SQLALCHEMY_ASYNC_DATABASE_URI
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=MeteredAsyncQueuePool,
+    connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+    **pool_options,
+)
+
+# expire_on_commit=False so committed objects can still be read without an implicit (blocking) reload.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 # Base MetaData class, all ORM Table classes derives from this Base class.
 # All derived class Metadata/Schema is attached to this class for Table creation.
 class Base(DeclarativeBase):
     pass
-
-# Function to create database tables
-# Should only be called once during server start up
-def create_db_and_tables():
-    Base.metadata.create_all(engine)
\ No newline at end of file
@@ -6,7 +6,7 @@ class Email(Base):
     __tablename__ = "emails"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.user_id"))
+    user_id = Column(Integer, ForeignKey("users.user_id"), index=True)
     message_id = Column(String, unique=True, index=True)
     thread_id = Column(String, nullable=True)
     sender = Column(String, nullable=True)
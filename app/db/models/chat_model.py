@@ -1,8 +1,11 @@
 from __future__ import annotations
+from typing import Optional
+from datetime import datetime
 from sqlalchemy import String, Text, Date, ForeignKey, Enum, Boolean, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
-from sqlalchemy import TIMESTAMP, func, JSON
+from sqlalchemy import TIMESTAMP, func, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class Chat(Base):
@@ -12,6 +15,48 @@ class Chat(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
 
     chat_title: Mapped[str] = mapped_column(String, nullable=False)
-    data: Mapped[JSON] = mapped_column(JSON, nullable=False)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
 
-    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_chats_data", "data", postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"}),
+        Index("ix_chats_user_id_created_date_id", "user_id", "created_date", "id"),
+    )
+
+
+class ChatSession(Base):
+    """
+    Server side conversation, the client only sends the new query and turns are appended as rows.
+    """
+    __tablename__ = "chat_sessions"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    title: Mapped[Optional[str]] = mapped_column(String(100))
+    # Rolling summary of the turns up to and including summarized_turn_id, later turns are sent verbatim
+    summary: Mapped[Optional[str]] = mapped_column(Text)
+    summarized_turn_id: Mapped[Optional[int]] = mapped_column(Integer)
+
+    created_date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_date: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Sessions are listed by latest activity, see chat_service.CHAT_SESSION_ACTIVITY_DATE
+        Index("ix_chat_sessions_user_id_activity_date_id", "user_id", text("coalesce(updated_date, created_date)"), "id"),
+    )
+
+
+class ChatTurn(Base):
+    __tablename__ = "chat_turns"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False)
+
+    user_message: Mapped[str] = mapped_column(Text, nullable=False)
+    assistant_message: Mapped[str] = mapped_column(Text, nullable=False)
+    created_date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_chat_turns_session_id_created_date_id", "session_id", "created_date", "id"),
+    )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, ForeignKey, TIMESTAMP, func, Integer
+from sqlalchemy import String, Text, ForeignKey, TIMESTAMP, func, Integer, Index
 from app.db.database import Base
 
 
@@ -12,3 +12,20 @@ class EmailSummary(Base):
     message_id = mapped_column(String, unique=True, index=True)
     summary: Mapped[str] = mapped_column(Text, nullable=False)
     created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_email_summaries_user_id_created_date_id", "user_id", "created_date", "id"),
+    )
+
+
+class EmailSummaryCache(Base):
+    """
+    Summaries shared across users, keyed by a hash of the normalized subject and body.
+    """
+    __tablename__ = "email_summary_cache"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    last_used_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
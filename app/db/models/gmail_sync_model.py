@@ -0,0 +1,17 @@
+from __future__ import annotations
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import ForeignKey, BigInteger, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+
+
+class GmailSyncCursor(Base):
+    __tablename__ = "gmail_sync_cursors"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    # Last Gmail historyId whose changes have been ingested for this user
+    history_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_date: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
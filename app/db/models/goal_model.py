@@ -2,7 +2,8 @@ from __future__ import annotations
 from sqlalchemy import String, Text, Date, ForeignKey, Enum, Boolean, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
-from sqlalchemy import TIMESTAMP, func, JSON
+from sqlalchemy import TIMESTAMP, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class Goal(Base):
@@ -11,5 +12,10 @@ class Goal(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
 
-    data: Mapped[JSON] = mapped_column(JSON, nullable=False)
-    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_goals_data", "data", postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"}),
+        Index("ix_goals_user_id_created_date_id", "user_id", "created_date", "id"),
+    )
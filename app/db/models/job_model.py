@@ -0,0 +1,32 @@
+from __future__ import annotations
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import String, Text, Integer, JSON, Index, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    # pending -> running -> done, or back to pending for a retry, or dead once attempts are exhausted
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5, server_default="5")
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    # Whatever the handler returned, e.g. the id of the row it created
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+
+    run_after: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    locked_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+    created_date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_date: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
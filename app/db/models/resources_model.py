@@ -2,7 +2,8 @@ from __future__ import annotations
 from sqlalchemy import String, Text, Date, ForeignKey, Enum, Boolean, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
-from sqlalchemy import TIMESTAMP, func, JSON
+from sqlalchemy import TIMESTAMP, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class Resource(Base):
@@ -11,6 +12,24 @@ class Resource(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
 
-    data: Mapped[JSON] = mapped_column(JSON, nullable=False)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
     resource_type: Mapped[str] = mapped_column(String, nullable=False)
-    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_resources_data", "data", postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"}),
+        Index("ix_resources_user_id_resource_type_created_date_id", "user_id", "resource_type", "created_date", "id"),
+    )
+
+
+class BookRecommendationCache(Base):
+    """
+    Book recommendations shared across users, keyed by the normalized topic.
+    """
+    __tablename__ = "book_recommendation_cache"
+
+    topic_key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    created_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    last_used_date: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
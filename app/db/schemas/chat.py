@@ -16,4 +16,12 @@ class ChatForm(BaseModel):
 class ChatCreate(BaseModel):
     user_id: int
     data: dict
-    chat_title: str
\ No newline at end of file
+    chat_title: str
+
+
+class ChatSessionCreate(BaseModel):
+    title: Optional[str] = None
+
+
+class ChatTurnForm(BaseModel):
+    query: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Json
+from pydantic import BaseModel, Json, Field
 from pydantic.types import date
 from typing import Optional
 
@@ -11,4 +11,9 @@ class GoalCreate(GoalBase):
 
 class GoalGenerationForm(BaseModel):
     exam_name: Optional[str] = None
-    target_date: Optional[date] = None
\ No newline at end of file
+    target_date: Optional[date] = None
+
+class GoalChecklistUpdate(BaseModel):
+    todo_index: int = Field(ge=0)
+    checklist_index: int = Field(ge=0)
+    is_done: bool
@@ -74,4 +74,5 @@ class ProfilePublic(ProfileBase):
 
 
 class ProfilesPublic(BaseModel):
-    data: list[ProfilePublic]
\ No newline at end of file
+    data: list[ProfilePublic]
+    next_cursor: Optional[str] = None
\ No newline at end of file
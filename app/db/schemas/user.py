@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
+from typing import Optional
 
 
 class UserBase(BaseModel):
@@ -13,6 +14,7 @@ class UserPublic(UserBase):
 
 class UsersPublic(BaseModel):
     data: list[UserPublic]
+    next_cursor: Optional[str] = None
 
 class UserCreate(UserBase):
     user_password: str
@@ -1,11 +1,19 @@
 from typing import Annotated
 from fastapi import Depends
-from collections.abc import Generator
+from collections.abc import Generator, AsyncGenerator
 from sqlalchemy.orm import Session
-from app.db.database import engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import engine, AsyncSessionLocal
 
 def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+SessionDep = Annotated[Session, Depends(get_db)]
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from app.core.security import authx_security
-from app.startup import startup
+from app.startup import startup, start_background_tasks
 from app.api import api_router
 from app.openapi_docs import doc
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,7 +9,7 @@ app = FastAPI(
     title=doc.title,
     summary=doc.summary,
     openapi_tags=doc.tags_metadata,
-    on_startup=[startup],
+    on_startup=[startup, start_background_tasks],
     contact=doc.contact,
     servers=[
         {"url": "/api", "description": "Default api URL Route"},
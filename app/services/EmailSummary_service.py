@@ -1,31 +1,56 @@
-from app.core.ai import AI_Client
-from app.db.session import SessionDep
+import hashlib
+from app.core import ai
+from app.core.config import settings
+from app.db.session import AsyncSessionDep
 from fastapi import HTTPException
-from sqlalchemy import select,desc
+from sqlalchemy import select, desc
+from sqlalchemy.dialects.postgresql import insert
 from app.db.models import email_summary_model
 from app.db.schemas.EmailSummary import EmailSummary
-from app.services import prompt_service
-
-def list_summary_by_user_id(user_id: int, session: SessionDep):
+from app.services import prompt_service, email_text_service
+from app.services.pagination import PageParams, fetch_page
+from app.services.table_cache_service import TableCache
+
+# Summaries shared across users in the email_summary_cache table
+summary_cache = TableCache(
+    name="Summary",
+    model=email_summary_model.EmailSummaryCache,
+    key_column=email_summary_model.EmailSummaryCache.content_hash,
+    value_column=email_summary_model.EmailSummaryCache.summary,
+    ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS,
+    max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+    memory_entries=settings.SUMMARY_CACHE_MEMORY_ENTRIES,
+)
+
+SUMMARY_LIST_COLUMNS = (
+    email_summary_model.EmailSummary.id,
+    email_summary_model.EmailSummary.user_id,
+    email_summary_model.EmailSummary.message_id,
+    email_summary_model.EmailSummary.summary,
+    email_summary_model.EmailSummary.created_date,
+)
+
+async def list_summary_by_user_id(user_id: int, page: PageParams, session: AsyncSessionDep):
     try:
-        statement = select(email_summary_model.EmailSummary).where(email_summary_model.EmailSummary.user_id == user_id).order_by(desc(email_summary_model.EmailSummary.created_date))
-        result =  session.execute(statement).all()
-        summary_list = []
-        for row in result:
-            summary_list.append(row.EmailSummary.__dict__)
-
-        return summary_list
+        summary = email_summary_model.EmailSummary
+        statement = select(*SUMMARY_LIST_COLUMNS).where(summary.user_id == user_id)
+        rows, next_cursor = await fetch_page(statement, summary.created_date, summary.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
     except Exception as e:
         print(e)
+        return [], None
 
 
-def generate_mail_summary(email: dict, session: SessionDep):
-    result = prompt_service.get_prompt_by_name("email_summary", session)
+async def generate_mail_summary(email: dict, session: AsyncSessionDep):
+    result = await prompt_service.get_prompt_by_name("email_summary", session)
     system_prompt = result.content
 
-    input_prompt = f" Simplify this raw email message: {email} "
+    input_prompt = f" Simplify this email message:\n{email_text_service.prepare_email_for_summary(email)} "
+
+    # End the read transaction, the pooled connection is not held while the LLM answers
+    await session.commit()
 
-    chat_completion = AI_Client.chat.completions.create(
+    response = await ai.chat_completion(
         messages=[
             {
                 "role": "system",
@@ -36,15 +61,42 @@ def generate_mail_summary(email: dict, session: SessionDep):
                 "content": input_prompt,
             },
         ],
-        model="llama-3.1-8b-instant",
     )
 
-    response = chat_completion.choices[0].message.content
-
     return response
 
 
-def save_mail_summary(user_id: int, message_id: str, summary: str, session: SessionDep):
+def summary_cache_key(email: dict) -> str:
+    """
+    Hash of the case folded, whitespace collapsed subject and cleaned body,
+    so per recipient tracking links do not split the cache.
+    """
+    text = f"{email.get('subject') or ''}\n{email_text_service.clean_email_body(email.get('body'))}"
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+async def get_or_generate_mail_summary(email: dict, session: AsyncSessionDep):
+    """
+    Return the cached summary of an identical mail if there is a fresh one,
+    otherwise generate it with the LLM and cache it for every user.
+    """
+    key = summary_cache_key(email)
+
+    summary = await summary_cache.get(key, session)
+    if summary is not None:
+        return summary
+
+    summary = await generate_mail_summary(email, session)
+    await summary_cache.set(key, summary, session)
+    return summary
+
+
+async def save_mail_summary(user_id: int, message_id: str, summary: str, session: AsyncSessionDep):
+    """
+    Store the summary unless the message already has one, then the existing row is kept
+    and None is returned.
+    """
     try:
 
         validated_email_summary = EmailSummary(
@@ -53,12 +105,16 @@ def save_mail_summary(user_id: int, message_id: str, summary: str, session: Sess
             summary=summary
         )
 
-        new_email_summary = email_summary_model.EmailSummary(**validated_email_summary.model_dump())
-
-        session.add(new_email_summary)
-        session.commit()
-        session.refresh(new_email_summary)
+        statement = (
+            insert(email_summary_model.EmailSummary)
+            .values(**validated_email_summary.model_dump())
+            .on_conflict_do_nothing(index_elements=[email_summary_model.EmailSummary.message_id])
+            .returning(email_summary_model.EmailSummary)
+        )
+        new_email_summary = await session.scalar(statement)
+        await session.commit()
     except Exception as e:
+        await session.rollback()
         print(e)
         raise HTTPException(status_code=400, detail="Something went wrong!")
 
@@ -66,11 +122,11 @@ def save_mail_summary(user_id: int, message_id: str, summary: str, session: Sess
 
 
 
-def get_summary_by_message_id(message_id: str, session: SessionDep):
+async def get_summary_by_message_id(message_id: str, session: AsyncSessionDep):
     """
     Fetch a single email by its unique message_id.
     """
     statement = select(email_summary_model.EmailSummary).where(email_summary_model.EmailSummary.message_id == message_id)
-    result = session.execute(statement).scalar_one_or_none()
+    result = (await session.execute(statement)).scalar_one_or_none()
     return result
 
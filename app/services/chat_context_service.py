@@ -0,0 +1,122 @@
+import re
+from app.core.ai import estimate_tokens, truncate_to_tokens
+from app.core.config import settings
+
+# Profile fields that help tailor answers, everything else (ids, hashes, ORM state) stays out of the prompt
+PROFILE_CONTEXT_FIELDS = {
+    "education_level": "Education level",
+    "institution": "Institution",
+    "board_or_university": "Board/University",
+    "current_semester": "Semester",
+    "subjects_enrolled": "Subjects",
+    "target_exam": "Target exam",
+    "learning_style": "Learning style",
+    "preferred_content_type": "Preferred content",
+    "language_preference": "Language",
+    "session_duration_preference": "Session length (min)",
+    "strong_subjects": "Strong subjects",
+    "weak_subjects": "Weak subjects",
+    "career_goal": "Career goal",
+}
+
+PROFILE_CONTEXT_TOKENS = 300
+SUMMARY_QUESTION_TOKENS = 30
+SUMMARY_ANSWER_TOKENS = 40
+
+
+def build_user_context(user, profile) -> str:
+    """
+    The user's name and their whitelisted profile fields.
+    """
+    lines = []
+    if user and user.user_full_name:
+        lines.append(f"Name: {user.user_full_name}")
+    profile_context = build_profile_context(profile)
+    if profile_context:
+        lines.append(profile_context)
+
+    return truncate_to_tokens("\n".join(lines), PROFILE_CONTEXT_TOKENS) or "Not provided"
+
+
+def build_profile_context(profile, fields: dict = PROFILE_CONTEXT_FIELDS, max_tokens: int = PROFILE_CONTEXT_TOKENS) -> str:
+    """
+    One line per whitelisted field that is set, e.g. "Target exam: NEET".
+    """
+    lines = []
+    for field, label in fields.items():
+        value = getattr(profile, field, None) if profile else None
+        if value in (None, "", [], {}):
+            continue
+        if isinstance(value, dict):
+            value = ", ".join(f"{key}: {item}" for key, item in value.items())
+        elif isinstance(value, (list, tuple)):
+            value = ", ".join(str(item) for item in value)
+        lines.append(f"{label}: {value}")
+
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+def format_turn(turn: dict, max_tokens: int) -> str:
+    user_message = truncate_to_tokens(str(turn.get("user") or ""), max_tokens // 2)
+    assistant_message = truncate_to_tokens(str(turn.get("system") or ""), max_tokens // 2)
+    return f"User: {user_message}\nAssistant: {assistant_message}"
+
+
+def summarize_turn(turn: dict) -> str:
+    """
+    Extractive one-liner: the question and the first sentence of the answer.
+    """
+    question = " ".join(str(turn.get("user") or "").split())
+    answer = " ".join(str(turn.get("system") or "").split())
+    first_sentence = re.split(r"(?<=[.!?])\s", answer, maxsplit=1)[0]
+    return (
+        f"- Asked: {truncate_to_tokens(question, SUMMARY_QUESTION_TOKENS)}"
+        f" | Answered: {truncate_to_tokens(first_sentence, SUMMARY_ANSWER_TOKENS)}"
+    )
+
+
+def merge_summary(summary: str, turns: list[dict]) -> str:
+    """
+    Append the folded turns to the rolling summary, dropping its oldest lines once it
+    exceeds CHAT_SUMMARY_TOKEN_BUDGET.
+    """
+    lines = (summary.splitlines() if summary else []) + [summarize_turn(turn) for turn in turns]
+
+    kept, used = [], 0
+    for line in reversed(lines):
+        used += estimate_tokens(line) + 1
+        if used > settings.CHAT_SUMMARY_TOKEN_BUDGET:
+            break
+        kept.append(line)
+    return "\n".join(reversed(kept))
+
+
+def build_chat_context(chat_history: list[dict], summary: str = None):
+    """
+    Fit the conversation into CHAT_CONTEXT_TOKEN_BUDGET: the newest turns are kept
+    verbatim while they fit, older ones are folded into the rolling summary.
+    Returns (context, summary, folded_turns); folded_turns are the oldest turns of
+    chat_history that went into the summary.
+    """
+    chat_history = [turn for turn in (chat_history or []) if isinstance(turn, dict)]
+
+    recent, used = [], 0
+    for turn in reversed(chat_history):
+        text = format_turn(turn, settings.CHAT_TURN_TOKEN_LIMIT)
+        cost = estimate_tokens(text)
+        if recent and used + cost > settings.CHAT_CONTEXT_TOKEN_BUDGET:
+            break
+        recent.append(text)
+        used += cost
+
+    folded_turns = chat_history[:len(chat_history) - len(recent)]
+    if folded_turns:
+        summary = merge_summary(summary, folded_turns)
+
+    sections = []
+    if summary:
+        sections.append(f"Summary of earlier conversation:\n{summary}")
+    if recent:
+        sections.append("Recent conversation:\n" + "\n\n".join(reversed(recent)))
+
+    return "\n\n".join(sections) or "None", summary, folded_turns
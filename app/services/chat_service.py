@@ -1,19 +1,122 @@
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func, update, or_
 from app.db.models.user_model import User
 from pydantic import EmailStr
-from app.db.models.chat_model import Chat
+from app.db.models.chat_model import Chat, ChatSession, ChatTurn
+from app.services.pagination import PageParams, fetch_page
 
 
-def list_user_chats(user_id: int, session: SessionDep):
+# List endpoints select plain columns instead of ORM objects and return the rows as dicts,
+# which the endpoint hands straight to ORJSONResponse.
+CHAT_LIST_COLUMNS = (Chat.id, Chat.user_id, Chat.chat_title, Chat.data, Chat.created_date)
+# Last turn time, or creation time for a session without turns; matches ix_chat_sessions_user_id_activity_date_id
+CHAT_SESSION_ACTIVITY_DATE = func.coalesce(ChatSession.updated_date, ChatSession.created_date).label("activity_date")
+CHAT_SESSION_LIST_COLUMNS = (
+    ChatSession.id,
+    ChatSession.title,
+    ChatSession.created_date,
+    ChatSession.updated_date,
+    CHAT_SESSION_ACTIVITY_DATE,
+)
+CHAT_TURN_LIST_COLUMNS = (ChatTurn.id, ChatTurn.user_message, ChatTurn.assistant_message, ChatTurn.created_date)
+
+
+async def list_user_chats(user_id: int, page: PageParams, session: AsyncSessionDep):
+    try:
+        statement = select(*CHAT_LIST_COLUMNS).where(Chat.user_id == user_id)
+        rows, next_cursor = await fetch_page(statement, Chat.created_date, Chat.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
+    except Exception as e:
+        print(e)
+        return [], None
+
+
+async def create_chat_session(user_id: int, title: str, session: AsyncSessionDep):
+    new_chat_session = ChatSession(user_id=user_id, title=title[:100] if title else None)
+    session.add(new_chat_session)
+    await session.commit()
+    await session.refresh(new_chat_session)
+    return new_chat_session
+
+
+async def get_user_chat_session(chat_session_id: int, user_id: int, session: AsyncSessionDep):
+    chat_session = await session.get(ChatSession, chat_session_id)
+    if not chat_session or chat_session.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Chat session not found!")
+    return chat_session
+
+
+async def list_user_chat_sessions(user_id: int, page: PageParams, session: AsyncSessionDep):
     try:
-        statement = select(Chat).where(Chat.user_id == user_id)
-        result =  session.execute(statement).mappings().all()
-        chats = []
-        for row in result:
-            chats.append(row.Chat.__dict__)
+        statement = select(*CHAT_SESSION_LIST_COLUMNS).where(ChatSession.user_id == user_id)
+        # Most recently active first, a conversation continued today comes before newer idle ones
+        rows, next_cursor = await fetch_page(statement, CHAT_SESSION_ACTIVITY_DATE, ChatSession.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
+    except Exception as e:
+        print(e)
+        return [], None
+
 
-        return chats
+async def list_chat_turns(chat_session_id: int, page: PageParams, session: AsyncSessionDep):
+    try:
+        statement = select(*CHAT_TURN_LIST_COLUMNS).where(ChatTurn.session_id == chat_session_id)
+        rows, next_cursor = await fetch_page(statement, ChatTurn.created_date, ChatTurn.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
     except Exception as e:
         print(e)
+        return [], None
+
+
+async def get_unsummarized_chat_history(chat_session: ChatSession, session: AsyncSessionDep):
+    """
+    Turns not yet folded into the session summary, oldest first, in the
+    {"system", "user"} shape of ChatForm.chat_history plus the turn id.
+    """
+    statement = (
+        select(ChatTurn.id, ChatTurn.user_message, ChatTurn.assistant_message)
+        .where(ChatTurn.session_id == chat_session.id)
+        .order_by(ChatTurn.created_date, ChatTurn.id)
+    )
+    if chat_session.summarized_turn_id:
+        statement = statement.where(ChatTurn.id > chat_session.summarized_turn_id)
+    rows = (await session.execute(statement)).all()
+    return [{"id": row.id, "system": row.assistant_message, "user": row.user_message} for row in rows]
+
+
+async def append_chat_turn(
+    chat_session: ChatSession,
+    user_message: str,
+    assistant_message: str,
+    session: AsyncSessionDep,
+    summary: str = None,
+    summarized_turn_id: int = None,
+):
+    """
+    Insert the turn as its own row, the earlier turns are never rewritten.
+    A new rolling summary is stored along with it when older turns were folded.
+    """
+    new_turn = ChatTurn(session_id=chat_session.id, user_message=user_message, assistant_message=assistant_message)
+    session.add(new_turn)
+
+    values = {"updated_date": func.now()}
+    if not chat_session.title:
+        # Keeps the title another request may have set since the session was loaded
+        values["title"] = func.coalesce(ChatSession.title, user_message[:100])
+    await session.execute(update(ChatSession).where(ChatSession.id == chat_session.id).values(**values))
+
+    if summarized_turn_id:
+        # Concurrent messages on the same session each fold from the summary they loaded;
+        # only a summary covering more turns than the stored one replaces it
+        await session.execute(
+            update(ChatSession)
+            .where(
+                ChatSession.id == chat_session.id,
+                or_(ChatSession.summarized_turn_id.is_(None), ChatSession.summarized_turn_id < summarized_turn_id),
+            )
+            .values(summary=summary, summarized_turn_id=summarized_turn_id)
+        )
+
+    await session.commit()
+    await session.refresh(new_turn)
+    return new_turn
@@ -0,0 +1,111 @@
+import re
+from html.parser import HTMLParser
+from app.core import ai
+from app.core.config import settings
+
+# Lines from which everything below is a quoted earlier message
+REPLY_MARKERS = [
+    re.compile(r"^On .+wrote:\s*$"),
+    re.compile(r"^-{2,}\s*Original Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^-{2,}\s*Forwarded message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^_{10,}\s*$"),
+]
+
+URL_PATTERN = re.compile(r"https?://\S+")
+TRACKING_HINTS = ("utm_", "click", "track", "redirect", "unsubscribe", "mailchimp", "list-manage", "sendgrid")
+MAX_URL_LENGTH = 80
+
+
+class _HTMLToText(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section", "article"}
+    SKIP_TAGS = {"script", "style", "head", "title", "noscript"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Visible text of an HTML document. Link targets are dropped, only the anchor text is kept.
+    """
+    parser = _HTMLToText()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def looks_like_html(text: str) -> bool:
+    return bool(re.search(r"<(html|body|div|p|br|table|span|a)\b", text, re.IGNORECASE))
+
+
+def strip_tracking_links(text: str) -> str:
+    def replace(match):
+        url = match.group(0)
+        if len(url) > MAX_URL_LENGTH or any(hint in url.lower() for hint in TRACKING_HINTS):
+            return ""
+        return url
+
+    return URL_PATTERN.sub(replace, text)
+
+
+def strip_quoted_replies(text: str) -> str:
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if any(marker.match(stripped) for marker in REPLY_MARKERS):
+            break
+        if stripped.startswith(">"):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def clean_email_body(body: str) -> str:
+    """
+    Plain, compact text of an email body: HTML removed, tracking links and quoted replies dropped,
+    whitespace collapsed.
+    """
+    if not body:
+        return ""
+    if looks_like_html(body):
+        body = html_to_text(body)
+
+    body = strip_quoted_replies(body)
+    body = strip_tracking_links(body)
+
+    lines = [" ".join(line.split()) for line in body.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def prepare_email_for_summary(email: dict, token_budget: int = None) -> str:
+    """
+    Prompt text for summarizing a parsed Gmail message (see mail_service.parse_gmail_message),
+    with the body cut to the token budget.
+    """
+    body = clean_email_body(email.get("body"))
+    body = ai.truncate_to_tokens(body, token_budget or settings.EMAIL_SUMMARY_TOKEN_BUDGET)
+
+    return (
+        f"From: {email.get('from') or ''}\n"
+        f"Subject: {email.get('subject') or ''}\n"
+        f"Date: {email.get('date') or ''}\n\n"
+        f"{body}"
+    )
@@ -1,33 +1,289 @@
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, text, func, cast, Integer, Numeric
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional
 from app.db.models.user_model import User
 from pydantic import EmailStr
 from app.db.models.goal_model import Goal
+from app.db.schemas.goal import GoalCreate
+from app.services import profile_service, chat_context_service
+from app.core import ai
+from app.services.pagination import PageParams, fetch_page
 
 
-def list_user_goals(user_id: int, session: SessionDep):
-    try:
-        statement = select(Goal).where(Goal.user_id == user_id)
-        result =  session.execute(statement).mappings().all()
-        goals = []
-        for row in result:
-            goals.append(row.Goal.__dict__)
+GOAL_JOB_KIND = "generate_goal"
+
+# Every profile field the planner can use; only ids, timestamps and ORM state are left out.
+# The schedule and score fields decide how much fits before the target date and where to start.
+GOAL_PROFILE_FIELDS = {
+    **chat_context_service.PROFILE_CONTEXT_FIELDS,
+    "available_hours_per_week": "Available hours per week",
+    "study_days": "Study days",
+    "study_time_preference": "Preferred study time",
+    "preferred_breaks": "Preferred breaks",
+    "reminder_frequency": "Reminder frequency",
+    "focus_level": "Focus level",
+    "motivation_level": "Motivation level",
+    "study_goals": "Study goals",
+    "previous_scores": "Previous scores",
+    "learning_gaps": "Learning gaps",
+    "desired_skills": "Desired skills",
+    "job_preference": "Job preference",
+    "certifications_interest": "Certifications of interest",
+}
+GOAL_PROFILE_TOKENS = 600
+
+GOAL_SYSTEM_PROMPT = """
+    You are an assistant named ExamPlanner.
+    Task: Read the exam name and produce exactly one JSON object (only JSON) that is a practical to-do list for the requested exam, interview, or study topic.
+    OUTPUT CONSTRAINT (mandatory):
+    - Return exactly one JSON object and nothing else. No leading/trailing text, no explanations, no markdown, no code fences, and no additional attachments.
+    SCHEMA & FIELD RULES (must follow exactly):
+    - Overall structure must follow the canonical fields: id, title, description, target_date, status, priority, progress, todos.
+    - Fields may be omitted only if explicitly allowed by the JSON Schema below.
+    - id fields: optional. If present, id must be either null or a non-numeric string. Do NOT generate numeric ids.
+    - title: required, string, concise and actionable. Max length 100 characters.
+    - description: required, string. Short summary only — do not include multi-paragraph instructions here.
+    - target_date: required, string in ISO format YYYY-MM-DD.
+    - status (top-level and per-todo): required; allowed values: "todo", "in_progress", "done", "blocked".
+    - priority (top-level and per-todo): required; allowed values: "low", "medium", "high".
+    - progress: required; integer 0..100. If feasible, compute progress as the percentage of top-level todos whose status == "done" (rounded to nearest integer). If not computed, provide a reasonable integer estimate.
+    - todos: required; array of todo objects ordered from highest priority/earliest to lowest.
+    - todo object required fields: title, status, priority, checklists.
+    - todo.id: optional; if present must be null or a non-numeric string.
+    - duration: optional; if present must follow "<number> <unit>" where unit ∈ days|weeks|months|years (e.g., "2 weeks").
+    - checklists: required; array of checklist objects.
+    - checklist object must include: item (string) and is_done (boolean). checklist.id is optional (null or non-numeric string) if present.
+    - Booleans must be literal true/false (no quotes).
+    - Do NOT add any fields beyond: id, title, description, target_date, status, priority, progress, todos, checklists, duration. (If you need to include resources or notes, add them as checklist items.)
+    - Arrays preserve order: earlier items = earlier/higher priority.
+    FORMAT & VALIDITY (must follow exactly):
+    - JSON must be valid and parseable: proper quoting, no trailing commas.
+    - Dates must match regex YYYY-MM-DD.
+    - Durations must match regex "^[0-9]+ (days|weeks|months|years)$".
+    - Titles must be ≤100 characters.
+    - If a required constraint cannot be met, output exactly one JSON object: {"error": "reason for failure"} (no other text).
+    LANGUAGE:
+    - Output language must be English.
+    BEHAVIOR FOR UNKNOWN/AMBIGUOUS EXAMS:
+    - If the exam name is ambiguous or not in typical examples, infer a short, realistic prep plan appropriate to the exam type (academic, government, professional). Do not ask clarifying questions.
+    ADDITIONAL NOTES FOR DEBUGGING:
+    - Keep each todo title short and actionable (example phrasing: "Read chapter 1 and make notes", "Attempt one mock test").
+    - Use checklist items for fine-grained steps.
+    - Generate large set up checklist for full coverage of topic
+    - Syllabus topics must have at least 10 checklists
+    - Progress computation is optional on the model side; server-side deterministic recomputation is recommended for production systems.
+    """
+
+
+def build_goal_user_prompt(exam_name, target_date, user_data) -> str:
+    return f"""
+    Use the canonical example JSON and Schema above. Generate a to-do list for: exam-name= {exam_name} target-date= {target_date}
+    Goal: Produce a clear, actionable to-do list for {exam_name} preparation that a student can follow.
+    Requirements:
+    - Output exactly one JSON object (only JSON) that validates against the provided JSON Schema.
+    - Put short, actionable steps in todo titles and checklist items.
+    - Provide rough timing estimates using `duration` for major phases where appropriate.
+    - Do not include any paragraph text outside `description`.
+    - If you cannot comply, return {{ "error": "reason for failure" }} as the sole output.
+    
+    here are some user data so you tailor output based on this {user_data}
+    """
+
+
+GOAL_LIST_COLUMNS = (Goal.id, Goal.user_id, Goal.data, Goal.created_date)
+
+# progress is written by the LLM and may be 40, 40.5 or "40%": take the leading number,
+# NULL when there is none, so one malformed document cannot fail the whole query.
+GOAL_PROGRESS = cast(
+    func.round(cast(func.substring(Goal.data["progress"].as_string(), r"^\s*(\d+(\.\d+)?)"), Numeric)),
+    Integer,
+)
 
-        return goals
+# Summary fields pulled out of the goal document by Postgres, so search results never ship the todos
+GOAL_SUMMARY_COLUMNS = (
+    Goal.id,
+    Goal.data["title"].as_string().label("title"),
+    Goal.data["status"].as_string().label("status"),
+    GOAL_PROGRESS.label("progress"),
+    Goal.data["target_date"].as_string().label("target_date"),
+    Goal.created_date,
+)
+
+
+async def list_user_goals(user_id: int, page: PageParams, session: AsyncSessionDep):
+    try:
+        statement = select(*GOAL_LIST_COLUMNS).where(Goal.user_id == user_id)
+        rows, next_cursor = await fetch_page(statement, Goal.created_date, Goal.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
     except Exception as e:
         print(e)
+        return [], None
+
+# Ticks one checklist item in place, then derives the todo's status from its checklists and the goal's
+# progress and status from its todos, all inside one UPDATE so the document never leaves Postgres.
+CHECKLIST_UPDATE_SQL = text("""
+WITH ticked AS (
+    SELECT id, jsonb_set(data, ARRAY['todos', :todo, 'checklists', :item, 'is_done'], to_jsonb(CAST(:is_done AS boolean))) AS data
+    FROM goals
+    WHERE id = :goal_id AND user_id = :user_id
+      AND data #> ARRAY['todos', :todo, 'checklists', :item] IS NOT NULL
+),
+todo AS (
+    SELECT ticked.id, jsonb_set(
+        ticked.data, ARRAY['todos', :todo, 'status'],
+        to_jsonb(CASE
+            WHEN checklist.done = checklist.total THEN 'done'
+            WHEN ticked.data #>> ARRAY['todos', :todo, 'status'] = 'blocked' THEN 'blocked'
+            WHEN checklist.done > 0 THEN 'in_progress'
+            ELSE 'todo'
+        END)
+    ) AS data
+    FROM ticked, LATERAL (
+        SELECT count(*) FILTER (WHERE (c ->> 'is_done')::boolean) AS done, count(*) AS total
+        FROM jsonb_array_elements(ticked.data #> ARRAY['todos', :todo, 'checklists']) AS c
+    ) AS checklist
+),
+summary AS (
+    SELECT todo.id, todo.data, todos.done, todos.total, todos.started
+    FROM todo, LATERAL (
+        SELECT count(*) FILTER (WHERE t ->> 'status' = 'done') AS done,
+               count(*) FILTER (WHERE t ->> 'status' <> 'todo') AS started,
+               count(*) AS total
+        FROM jsonb_array_elements(todo.data -> 'todos') AS t
+    ) AS todos
+)
+UPDATE goals
+SET data = summary.data || jsonb_build_object(
+    'progress', round(100.0 * summary.done / greatest(summary.total, 1))::int,
+    'status', CASE
+        WHEN summary.done = summary.total THEN 'done'
+        WHEN summary.data ->> 'status' = 'blocked' THEN 'blocked'
+        WHEN summary.started > 0 THEN 'in_progress'
+        ELSE 'todo'
+    END
+)
+FROM summary
+WHERE goals.id = summary.id
+RETURNING goals.id,
+          goals.data ->> 'status' AS status,
+          (goals.data ->> 'progress')::int AS progress,
+          goals.data #>> ARRAY['todos', :todo, 'status'] AS todo_status,
+          goals.data #> ARRAY['todos', :todo, 'checklists', :item] AS checklist_item
+""").columns(checklist_item=JSONB)
 
 
+async def search_user_goals(
+    user_id: int,
+    page: PageParams,
+    session: AsyncSessionDep,
+    title: Optional[str] = None,
+    status: Optional[str] = None,
+    min_progress: Optional[int] = None,
+):
+    try:
+        statement = select(*GOAL_SUMMARY_COLUMNS).where(Goal.user_id == user_id)
+        if status:
+            # Containment is answered by the GIN index on data
+            statement = statement.where(Goal.data.contains({"status": status}))
+        if title:
+            statement = statement.where(Goal.data["title"].as_string().ilike(f"%{title}%"))
+        if min_progress is not None:
+            statement = statement.where(GOAL_PROGRESS >= min_progress)
+        rows, next_cursor = await fetch_page(statement, Goal.created_date, Goal.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
+    except Exception as e:
+        print(e)
+        return [], None
+
 
-def get_user_goal(goal_id: int, session: SessionDep):
+async def get_user_goal(goal_id: int, session: AsyncSessionDep):
     goal_in_db = None
     try:
-        goal_in_db = session.get(Goal, goal_id)
+        goal_in_db = await session.get(Goal, goal_id)
     except Exception as e:
         print(e)
 
     if not goal_in_db:
         raise HTTPException(status_code=404, detail="Goal not found!")
 
-    return goal_in_db
\ No newline at end of file
+    return goal_in_db
+
+
+async def update_goal_checklist_item(
+    goal_id: int,
+    user_id: int,
+    todo_index: int,
+    checklist_index: int,
+    is_done: bool,
+    session: AsyncSessionDep,
+):
+    try:
+        result = await session.execute(
+            CHECKLIST_UPDATE_SQL,
+            {
+                "goal_id": goal_id,
+                "user_id": user_id,
+                "todo": str(todo_index),
+                "item": str(checklist_index),
+                "is_done": is_done,
+            },
+        )
+        row = result.first()
+        await session.commit()
+    except Exception as e:
+        print(e)
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Failed to update goal!")
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Checklist item not found!")
+
+    return row._asdict()
+
+
+async def generate_goal(user_id: int, exam_name: str, target_date, session: AsyncSessionDep):
+    """
+    Ask the LLM for a goal plan tailored to the user's profile and store it.
+    Raises when the output is not a valid goal document.
+    """
+    # Profile fields without ids or timestamps, students with the same profile and exam send an identical prompt
+    profile = await profile_service.get_profile_by_user_id(user_id, session)
+    user_data = chat_context_service.build_profile_context(profile, GOAL_PROFILE_FIELDS, GOAL_PROFILE_TOKENS)
+
+    # End the read transaction, the pooled connection is not held while the LLM answers
+    await session.commit()
+    goal_data = await ai.chat_completion(
+        coalesce=True,
+        messages=[
+            {
+                "role": "system",
+                "content": GOAL_SYSTEM_PROMPT,
+            },
+            {
+                "role": "user",
+                "content": build_goal_user_prompt(exam_name, target_date, user_data),
+            },
+        ],
+    )
+
+    # Validate with Pydantic model
+    validated_goal = GoalCreate(
+        data=goal_data,
+        user_id=user_id
+    )
+
+    new_goal = Goal(**validated_goal.model_dump())
+    session.add(new_goal)
+    await session.commit()
+    await session.refresh(new_goal)
+    return new_goal
+
+
+async def process_goal_generation(payload: dict, session: AsyncSessionDep):
+    """
+    Worker handler for "generate_goal" jobs, the returned dict is stored as the job result.
+    """
+    new_goal = await generate_goal(payload["user_id"], payload.get("exam_name"), payload.get("target_date"), session)
+    return {"goal_id": new_goal.id}
@@ -1,15 +1,42 @@
+import asyncio
+import weakref
+from cachetools import LRUCache, TTLCache
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from sqlalchemy import select, func
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
 from app.db.models.google_account_model import GoogleAccount
 from app.services.user_service import get_user_by_email, get_user
+import re
 import httpx
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from google.auth import jwt
 from app.core.config import settings
-
-def save_oauth_tokens(google_user_info: dict, tokens: dict, session: SessionDep):
+from app.core.http import google_client
+from app.db.database import AsyncSessionLocal
+
+# In-process cache of access tokens: user_id -> (access_token, UTC expiry)
+token_cache = LRUCache(maxsize=settings.GOOGLE_TOKEN_CACHE_SIZE)
+# Users whose token was asked for recently, the only ones refreshed ahead of expiry
+active_token_users = TTLCache(maxsize=settings.GOOGLE_TOKEN_CACHE_SIZE, ttl=settings.GOOGLE_TOKEN_ACTIVE_WINDOW_SECONDS)
+# One lock per user, so only one refresh per account runs at a time; dropped once nobody holds it
+token_refresh_locks: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
+
+TOKEN_EXPIRY_GRACE = timedelta(minutes=1)
+
+GOOGLE_OAUTH2_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+DEFAULT_CERTS_TTL_SECONDS = 3600
+# An unknown key id forces a refetch at most this often, so forged tokens cannot make every request fetch certs
+FORCED_CERTS_REFRESH_INTERVAL = timedelta(minutes=1)
+# Shared across requests, refreshed when max-age runs out or an unknown key id shows up
+google_certs_cache = {
+    "certs": None,
+    "expires_at": datetime.min.replace(tzinfo=timezone.utc),
+    "fetched_at": datetime.min.replace(tzinfo=timezone.utc),
+}
+google_certs_lock = asyncio.Lock()
+
+async def save_oauth_tokens(google_user_info: dict, tokens: dict, session: AsyncSessionDep):
     """
     Save or update essential Google OAuth tokens for a user.
     Only stores access_token, refresh_token, token_expiry, and google_email.
@@ -17,17 +44,18 @@ def save_oauth_tokens(google_user_info: dict, tokens: dict, session: SessionDep)
     google_email = google_user_info.get("email")
 
     # Ensure Google email matches logged-in user
-    user_in_db = get_user_by_email(google_email, session)
+    user_in_db = await get_user_by_email(google_email, session)
     if not user_in_db:
         raise HTTPException(status_code=403, detail="Google account email does not match any account")
 
     print(user_in_db)
     expires_in = tokens.get("expires_in", 3600)
+    token_expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
 
     try:
         # Check if GoogleAccount already exists for this user
         statement = select(GoogleAccount).where(GoogleAccount.user_id == user_in_db.get("user_id"))
-        google_account = session.execute(statement).scalar_one_or_none()
+        google_account = (await session.execute(statement)).scalar_one_or_none()
 
         if not google_account:
             # Create new record
@@ -36,26 +64,27 @@ def save_oauth_tokens(google_user_info: dict, tokens: dict, session: SessionDep)
                 google_email=google_email,
                 access_token=tokens["access_token"],
                 refresh_token=tokens.get("refresh_token"),
-                token_expiry=func.now() + timedelta(seconds=expires_in)
+                token_expiry=token_expiry
             )
             session.add(google_account)
         else:
             # Update existing record
             google_account.access_token = tokens["access_token"]
             google_account.refresh_token = tokens.get("refresh_token", google_account.refresh_token)
-            google_account.token_expiry = func.now() + timedelta(seconds=expires_in)
+            google_account.token_expiry = token_expiry
 
-        session.commit()
+        await session.commit()
+        token_cache[google_account.user_id] = (google_account.access_token, token_expiry)
         return google_account.__dict__
 
     except Exception as e:
         print("Error saving OAuth tokens:", e)
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail="Failed to save Google OAuth tokens")
 
 
 
-def exchange_code_for_tokens(code: str):
+async def exchange_code_for_tokens(code: str):
     """
     Exchange authorization code for access and refresh tokens.
     """
@@ -67,7 +96,7 @@ def exchange_code_for_tokens(code: str):
         "grant_type": "authorization_code"
     }
 
-    response = httpx.post(settings.GOOGLE_TOKEN_URI, data=data)
+    response = await google_client.post(settings.GOOGLE_TOKEN_URI, data=data)
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Failed to get Google OAuth tokens")
 
@@ -75,32 +104,67 @@ def exchange_code_for_tokens(code: str):
 
 
 
-def verify_id_token(id_token_str: str):
+async def get_google_certs(force_refresh: bool = False) -> dict:
+    """
+    Google's ID token signing certificates, cached for the max-age of their Cache-Control header.
+    force_refresh is ignored when the certs were fetched less than FORCED_CERTS_REFRESH_INTERVAL ago.
+    """
+    def is_fresh(now: datetime) -> bool:
+        if not google_certs_cache["certs"] or google_certs_cache["expires_at"] <= now:
+            return False
+        return not force_refresh or google_certs_cache["fetched_at"] > now - FORCED_CERTS_REFRESH_INTERVAL
+
+    if is_fresh(datetime.now(timezone.utc)):
+        return google_certs_cache["certs"]
+
+    async with google_certs_lock:
+        now = datetime.now(timezone.utc)
+        if is_fresh(now):
+            return google_certs_cache["certs"]
+
+        response = await google_client.get(GOOGLE_OAUTH2_CERTS_URL)
+        response.raise_for_status()
+
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        ttl = int(max_age.group(1)) if max_age else DEFAULT_CERTS_TTL_SECONDS
+
+        google_certs_cache["certs"] = response.json()
+        google_certs_cache["expires_at"] = now + timedelta(seconds=ttl)
+        google_certs_cache["fetched_at"] = now
+        return google_certs_cache["certs"]
+
+
+
+async def verify_id_token(id_token_str: str):
     """
     Verify ID token and extract user info.
+    Same checks as google.oauth2.id_token.verify_oauth2_token, but with cached certificates.
     """
     try:
-        user_info = id_token.verify_oauth2_token(
-            id_token_str,
-            requests.Request(),
-            settings.GOOGLE_CLIENT_ID
-        )
+        certs = await get_google_certs()
+        # Keys rotated since the certs were cached
+        if jwt.decode_header(id_token_str).get("kid") not in certs:
+            certs = await get_google_certs(force_refresh=True)
+
+        user_info = jwt.decode(id_token_str, certs=certs, audience=settings.GOOGLE_CLIENT_ID, clock_skew_in_seconds=10)
+        if user_info.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {user_info.get('iss')}")
         return user_info
     except ValueError as e:
         raise Exception(f"Invalid ID token: {e}")
 
 
-def get_user_google_account(user_id: int, session: SessionDep):
+async def get_user_google_account(user_id: int, session: AsyncSessionDep):
     """
     Retrieve the Google account record for the currently logged-in user.
     """
     statement = select(GoogleAccount).where(GoogleAccount.user_id == user_id)
-    account = session.execute(statement).scalar_one_or_none()
+    account = (await session.execute(statement)).scalar_one_or_none()
     return account
 
 
 
-def fetch_user_gmail_messages(access_token: str, max_results: int = 10):
+async def fetch_user_gmail_messages(access_token: str, max_results: int = 10):
     """
     Fetch Gmail messages using an always-valid token.
     """
@@ -109,7 +173,7 @@ def fetch_user_gmail_messages(access_token: str, max_results: int = 10):
     gmail_api_url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages"
     params = {"maxResults": max_results}
 
-    response = httpx.get(gmail_api_url, headers=headers, params=params, timeout=10.0)
+    response = await google_client.get(gmail_api_url, headers=headers, params=params)
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
@@ -117,29 +181,56 @@ def fetch_user_gmail_messages(access_token: str, max_results: int = 10):
 
 
 
-def get_valid_google_access_token(user_id: int, session: SessionDep) -> str:
+async def get_valid_google_access_token(user_id: int, session: AsyncSessionDep) -> str:
     """
     Ensure the Google access token for a user is valid.
     If expired or near expiry, refresh it automatically.
     Returns a valid access token string.
+    Served from the in-process cache when possible; concurrent callers for the same
+    user share a single DB lookup / refresh.
+    """
+    active_token_users[user_id] = True
+
+    cached = token_cache.get(user_id)
+    if cached and cached[1] > datetime.now(timezone.utc) + TOKEN_EXPIRY_GRACE:
+        return cached[0]
+
+    lock = token_refresh_locks.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        # Another request may have refreshed it while we waited
+        cached = token_cache.get(user_id)
+        if cached and cached[1] > datetime.now(timezone.utc) + TOKEN_EXPIRY_GRACE:
+            return cached[0]
+
+        return await refresh_google_access_token(user_id, session, TOKEN_EXPIRY_GRACE)
+
+
+
+async def refresh_google_access_token(user_id: int, session: AsyncSessionDep, min_validity: timedelta) -> str:
+    """
+    Load the stored token and refresh it if it expires within min_validity.
+    Updates the DB and the token cache. Callers must hold the user's refresh lock.
     """
     statement = select(GoogleAccount).where(GoogleAccount.user_id == user_id)
-    google_account = session.execute(statement).scalar_one_or_none()
+    google_account = (await session.execute(statement)).scalar_one_or_none()
 
     if not google_account:
         raise HTTPException(status_code=404, detail="Google account not linked")
 
     now = datetime.now(timezone.utc)
-
-    # Normalize DB-stored expiry to UTC-aware datetime
-    token_expiry = google_account.token_expiry
-    if token_expiry and token_expiry.tzinfo is None:
-        token_expiry = token_expiry.replace(tzinfo=timezone.utc)
-
-    # Check expiry (with 1 minute grace)
-    if token_expiry and token_expiry > now + timedelta(minutes=1):
+    if google_account.token_expiry > now + min_validity:
+        token_cache[user_id] = (google_account.access_token, google_account.token_expiry)
         return google_account.access_token  # still valid
 
+    # Lock the row so API processes and the worker refresh an account once between them,
+    # whoever waited finds the refreshed token. The commit or rollback below releases it.
+    statement = statement.with_for_update().execution_options(populate_existing=True)
+    google_account = (await session.execute(statement)).scalar_one()
+    if google_account.token_expiry > now + min_validity:
+        await session.commit()
+        token_cache[user_id] = (google_account.access_token, google_account.token_expiry)
+        return google_account.access_token
+
     # Otherwise refresh using refresh_token
     if not google_account.refresh_token:
         raise HTTPException(status_code=401, detail="Missing refresh token. Please re-link Google account.")
@@ -153,7 +244,7 @@ def get_valid_google_access_token(user_id: int, session: SessionDep) -> str:
     }
 
     try:
-        response = httpx.post(token_url, data=payload, timeout=10.0)
+        response = await google_client.post(token_url, data=payload)
         if response.status_code != 200:
             raise HTTPException(status_code=400, detail=f"Failed to refresh token: {response.text}")
 
@@ -165,22 +256,53 @@ def get_valid_google_access_token(user_id: int, session: SessionDep) -> str:
             raise HTTPException(status_code=400, detail="No access token returned by Google")
 
         # Update DB with new token + expiry
+        token_expiry = now + timedelta(seconds=expires_in)
         google_account.access_token = access_token
-        google_account.token_expiry = func.now() + timedelta(seconds=expires_in)
-        session.commit()
+        google_account.token_expiry = token_expiry
+        await session.commit()
 
+        token_cache[user_id] = (access_token, token_expiry)
         return access_token
 
     except Exception as e:
         print("Error refreshing Google token:", e)
-        session.rollback()
+        await session.rollback()
+        token_cache.pop(user_id, None)
         raise HTTPException(status_code=500, detail="Failed to refresh Google access token")
 
 
 
-def get_gmail_message(access_token: str, message_id: str):
+async def refresh_expiring_tokens_loop():
+    """
+    Background task: refresh cached tokens of recently active users shortly before
+    they expire, so handlers almost never wait on the token endpoint.
+    Runs in every API process and in the worker, each over the users it served;
+    the row lock in refresh_google_access_token keeps it to one refresh per account.
+    """
+    refresh_ahead = timedelta(seconds=settings.GOOGLE_TOKEN_REFRESH_AHEAD_SECONDS)
+    while True:
+        await asyncio.sleep(settings.GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS)
+
+        expiring_before = datetime.now(timezone.utc) + refresh_ahead
+        expiring = [
+            user_id for user_id, (_, expiry) in list(token_cache.items())
+            if expiry <= expiring_before and user_id in active_token_users
+        ]
+
+        for user_id in expiring:
+            lock = token_refresh_locks.setdefault(user_id, asyncio.Lock())
+            try:
+                async with lock:
+                    async with AsyncSessionLocal() as session:
+                        await refresh_google_access_token(user_id, session, refresh_ahead)
+            except Exception as e:
+                print(f"Background token refresh failed for user {user_id}:", e)
+
+
+
+async def get_gmail_message(access_token: str, message_id: str):
     url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
     params = {"format": "metadata", "metadataHeaders": ["From", "Subject", "Date"]}
-    response = httpx.get(url, headers=headers, params=params)
+    response = await google_client.get(url, headers=headers, params=params)
     return response.json()
\ No newline at end of file
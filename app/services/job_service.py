@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, or_, and_
+from app.core.config import settings
+from app.db.session import AsyncSessionDep
+from app.db.models.job_model import Job
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_DEAD = "dead"
+
+
+async def enqueue_job(kind: str, payload: dict, session: AsyncSessionDep, max_attempts: int = None):
+    """
+    Store a job for the worker and commit, so it survives a crash right after the request returns.
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status=JOB_PENDING,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    session.add(job)
+    await session.commit()
+    return job
+
+
+async def claim_job(session: AsyncSessionDep, kinds: list[str] = None):
+    """
+    Claim the next runnable job with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never pick the same row. Running jobs whose lock expired (worker died) are
+    claimed again. Returns None when there is nothing to do.
+    """
+    now = datetime.now(timezone.utc)
+    lock_expired = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+
+    statement = (
+        select(Job)
+        .where(
+            or_(
+                and_(Job.status == JOB_PENDING, Job.run_after <= now),
+                and_(Job.status == JOB_RUNNING, Job.locked_at < lock_expired),
+            )
+        )
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if kinds:
+        statement = statement.where(Job.kind.in_(kinds))
+
+    job = (await session.execute(statement)).scalar_one_or_none()
+    if not job:
+        await session.rollback()
+        return None
+
+    job.status = JOB_RUNNING
+    job.attempts = job.attempts + 1
+    job.locked_at = now
+    await session.commit()
+    return job
+
+
+async def get_job(job_id: int, session: AsyncSessionDep):
+    return await session.get(Job, job_id)
+
+
+async def complete_job(job_id: int, session: AsyncSessionDep, result: dict = None):
+    job = await session.get(Job, job_id)
+    job.status = JOB_DONE
+    job.locked_at = None
+    job.last_error = None
+    job.result = result
+    await session.commit()
+    return job
+
+
+async def fail_job(job_id: int, error: str, session: AsyncSessionDep):
+    """
+    Schedule a retry with exponential backoff, or dead-letter the job once
+    max_attempts is reached. Dead jobs stay in the table for inspection.
+    """
+    job = await session.get(Job, job_id)
+    job.last_error = error
+    job.locked_at = None
+
+    if job.attempts >= job.max_attempts:
+        job.status = JOB_DEAD
+    else:
+        backoff = min(
+            settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1),
+            settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+        )
+        job.status = JOB_PENDING
+        job.run_after = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+
+    await session.commit()
+    return job
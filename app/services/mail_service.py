@@ -1,36 +1,35 @@
 import httpx
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import HTTPException
+from app.core.config import settings
+from app.core.http import google_client
 import base64
 from app.db.models import Email_model
-from app.db.session import SessionDep
+from app.db.models.gmail_sync_model import GmailSyncCursor
+from sqlalchemy.dialects.postgresql import insert
+from app.db.session import AsyncSessionDep
+from app.db.database import async_engine
 import json
-from sqlalchemy import select
+from sqlalchemy import select, func
+from app.services import user_service, EmailSummary_service
+from app.services.google_account_service import get_valid_google_access_token
 
-def fetch_gmail_message(access_token: str, message_id: str):
+async def fetch_gmail_message(access_token: str, message_id: str, message_format: str = "full"):
     """
-    Fetch full Gmail message using stored access token.
+    Fetch a Gmail message using stored access token.
+    Use message_format="metadata" when only the headers are needed, body is then None.
     """
     url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
-    params = {"format": "full"}
+    params = {"format": message_format}
+    if message_format == "metadata":
+        params["metadataHeaders"] = ["From", "To", "Subject", "Date"]
 
     try:
-        r = httpx.get(url, headers=headers, params=params)
+        r = await google_client.get(url, headers=headers, params=params)
         r.raise_for_status()
-        msg = r.json()
-
-        headers_map = {h["name"]: h["value"] for h in msg["payload"]["headers"]}
-        body = extract_email_body(msg.get("payload", {}))
-
-        return {
-            "id": msg["id"],
-            "threadId": msg.get("threadId"),
-            "from": headers_map.get("From"),
-            "to": headers_map.get("To"),
-            "subject": headers_map.get("Subject"),
-            "date": headers_map.get("Date"),
-            "body": body,
-        }
+        return parse_gmail_message(r.json(), with_body=message_format == "full")
 
     except httpx.HTTPStatusError as e:
         print("Gmail API error:", e.response.text)
@@ -41,27 +40,75 @@ def fetch_gmail_message(access_token: str, message_id: str):
 
 
 
+async def fetch_gmail_messages(access_token: str, message_ids: list[str], message_format: str = "full", concurrency: int = None):
+    """
+    Fetch many Gmail messages concurrently over the shared keep-alive client.
+    At most `concurrency` requests are in flight, results keep the order of message_ids.
+    Messages deleted since their ids were listed (404) are skipped, any other error is raised.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.GMAIL_FETCH_CONCURRENCY)
+
+    async def fetch(message_id: str):
+        async with semaphore:
+            try:
+                return await fetch_gmail_message(access_token, message_id, message_format)
+            except HTTPException as e:
+                if e.status_code != 404:
+                    raise
+                print("Gmail message no longer exists, skipping:", message_id)
+                return None
+
+    mails = await asyncio.gather(*(fetch(message_id) for message_id in message_ids))
+    return [mail for mail in mails if mail is not None]
+
+
+
+def parse_gmail_message(msg: dict, with_body: bool = True):
+    """Flatten a Gmail API message resource into the dict stored by save_gmail."""
+    payload = msg.get("payload", {})
+    headers_map = {h["name"]: h["value"] for h in payload.get("headers", [])}
+    body = extract_email_body(payload) if with_body else None
+
+    return {
+        "id": msg["id"],
+        "threadId": msg.get("threadId"),
+        "from": headers_map.get("From"),
+        "to": headers_map.get("To"),
+        "subject": headers_map.get("Subject"),
+        "date": headers_map.get("Date"),
+        "body": body,
+    }
+
+
+
 
 def extract_email_body(payload):
-    """Recursively extract and decode the email body (HTML or plain text)."""
-    if "parts" in payload:
-        for part in payload["parts"]:
-            mime_type = part.get("mimeType", "")
-            if mime_type in ["text/html", "text/plain"]:
-                data = part["body"].get("data")
-                if data:
-                    return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-            inner_body = extract_email_body(part)
-            if inner_body:
-                return inner_body
-    else:
-        data = payload.get("body", {}).get("data")
-        if data:
-            return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
+    """Recursively extract and decode the email body, preferring text/plain over HTML."""
+    parts = find_body_parts(payload)
+    data = parts.get("text/plain") or parts.get("text/html")
+    if data:
+        return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
     return "(No content found)"
 
 
-def start_gmail_watch(access_token: str, topic_name: str):
+def find_body_parts(payload, found=None):
+    """Map of mime type -> base64 data for the first text/plain and text/html parts."""
+    if found is None:
+        found = {}
+    mime_type = payload.get("mimeType", "")
+    data = payload.get("body", {}).get("data")
+    if data and mime_type in ["text/html", "text/plain"] and mime_type not in found:
+        found[mime_type] = data
+    elif data and not payload.get("parts") and "text/plain" not in found:
+        # single part message with an unexpected mime type
+        found.setdefault("text/plain", data)
+
+    for part in payload.get("parts", []):
+        find_body_parts(part, found)
+    return found
+
+
+async def start_gmail_watch(access_token: str, topic_name: str):
     """
     Start Gmail push notifications for the user.
 
@@ -84,7 +131,7 @@ def start_gmail_watch(access_token: str, topic_name: str):
         "labelFilterAction": "include"  # include only these labels
     }
 
-    response = httpx.post(url, headers=headers, json=body)
+    response = await google_client.post(url, headers=headers, json=body)
 
     if response.status_code != 200:
         print("Failed to start Gmail watch:", response.text)
@@ -94,7 +141,7 @@ def start_gmail_watch(access_token: str, topic_name: str):
 
 
 
-def fetch_user_gmail_latest_message_id(access_token: str):
+async def fetch_user_gmail_latest_message_id(access_token: str):
     """
     Fetch Gmail messages using an always-valid token.
     """
@@ -103,7 +150,7 @@ def fetch_user_gmail_latest_message_id(access_token: str):
     gmail_api_url = f"https://gmail.googleapis.com/gmail/v1/users/me/messages"
     params = {"maxResults": 1}
 
-    response = httpx.get(gmail_api_url, headers=headers, params=params, timeout=10.0)
+    response = await google_client.get(gmail_api_url, headers=headers, params=params)
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
@@ -118,7 +165,7 @@ def fetch_user_gmail_latest_message_id(access_token: str):
 
 
 
-def save_gmail(user_id: int, msg: dict, session: SessionDep):
+async def save_gmail(user_id: int, msg: dict, session: AsyncSessionDep):
     """
     Save a Gmail message to the database.
     `msg` should be a dict with keys: id, threadId, from, to, subject, date, body
@@ -136,19 +183,173 @@ def save_gmail(user_id: int, msg: dict, session: SessionDep):
             raw=json.dumps(msg)
         )
         session.add(gmail_msg)
-        session.commit()
+        await session.commit()
         return gmail_msg.__dict__
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         print("Error saving email:", e)
         return None
 
 
 
-def get_email_by_message_id(message_id: str, session: SessionDep):
+async def get_email_by_message_id(message_id: str, session: AsyncSessionDep):
     """
     Fetch a single email by its unique message_id.
     """
     statement = select(Email_model.Email).where(Email_model.Email.message_id == message_id)
-    result = session.execute(statement).scalar_one_or_none()
+    result = (await session.execute(statement)).scalar_one_or_none()
     return result
+
+
+
+async def fetch_gmail_history_message_ids(access_token: str, start_history_id: int):
+    """
+    List the ids of messages added to the inbox since start_history_id, following every page.
+    Returns (message_ids, latest_history_id), or None when Gmail no longer has history
+    that old (404) and the caller has to resync.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    gmail_api_url = "https://gmail.googleapis.com/gmail/v1/users/me/history"
+    params = {
+        "startHistoryId": start_history_id,
+        "historyTypes": "messageAdded",
+        "labelId": "INBOX",
+        "maxResults": 500,
+    }
+
+    message_ids = []
+    latest_history_id = start_history_id
+    while True:
+        response = await google_client.get(gmail_api_url, headers=headers, params=params)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        data = response.json()
+        for history in data.get("history", []):
+            for added in history.get("messagesAdded", []):
+                message_id = added["message"]["id"]
+                if message_id not in message_ids:
+                    message_ids.append(message_id)
+
+        latest_history_id = max(latest_history_id, int(data.get("historyId", latest_history_id)))
+
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+        params["pageToken"] = page_token
+
+    return message_ids, latest_history_id
+
+
+
+async def get_gmail_sync_cursor(user_id: int, session: AsyncSessionDep):
+    return await session.get(GmailSyncCursor, user_id)
+
+
+
+async def save_gmail_sync_cursor(user_id: int, history_id: int, session: AsyncSessionDep):
+    """
+    Create or advance the user's sync cursor. The cursor never moves backwards,
+    so late or redelivered notifications cannot rewind it.
+    """
+    statement = insert(GmailSyncCursor).values(user_id=user_id, history_id=int(history_id))
+    statement = statement.on_conflict_do_update(
+        index_elements=[GmailSyncCursor.user_id],
+        set_={"history_id": statement.excluded.history_id, "updated_date": func.now()},
+        where=GmailSyncCursor.history_id < statement.excluded.history_id,
+    )
+    await session.execute(statement)
+    await session.commit()
+
+
+
+# First key of the pg_advisory_lock(int, int) pair, the second is the user id
+GMAIL_SYNC_LOCK_CLASS = 1
+
+
+@asynccontextmanager
+async def gmail_sync_lock(user_id: int):
+    """
+    Hold a Postgres advisory lock on the user's Gmail sync, on its own connection so the
+    job session can still commit every message. A notification that arrives during a
+    sync waits here and then starts from the advanced cursor.
+    """
+    async with async_engine.connect() as connection:
+        await connection.execute(select(func.pg_advisory_lock(GMAIL_SYNC_LOCK_CLASS, user_id)))
+        try:
+            yield
+        finally:
+            await connection.execute(select(func.pg_advisory_unlock(GMAIL_SYNC_LOCK_CLASS, user_id)))
+
+
+
+async def process_gmail_message(user_id: int, mail: dict, session: AsyncSessionDep):
+    """
+    Save one fetched Gmail message and its summary, skipping whatever is already stored.
+    """
+    mail_duplicate = await get_email_by_message_id(mail["id"], session)
+    if not mail_duplicate:
+        await save_gmail(user_id, mail, session)
+
+    summary = await EmailSummary_service.get_or_generate_mail_summary(mail, session)
+    await EmailSummary_service.save_mail_summary(user_id, mail["id"], summary, session)
+
+
+
+async def process_gmail_notification(payload: dict, session: AsyncSessionDep):
+    """
+    Job handler for a Gmail Pub/Sub notification queued by the webhook.
+    Ingests every inbox message added since the user's sync cursor and then advances it.
+    Raising makes the worker retry the job, the cursor only moves once all messages are stored.
+    """
+    email_address = payload.get("emailAddress")
+    notification_history_id = int(payload.get("historyId"))
+
+    user = await user_service.get_user_by_email(email_address, session)
+    if not user:
+        print("Gmail notification for unknown address:", email_address)
+        return
+    user_id = user.get("user_id")
+
+    # Notifications for the same user run one at a time, so a burst reads the history once.
+    # The read transaction ends first, a job waiting for the lock holds only the lock connection.
+    await session.commit()
+    async with gmail_sync_lock(user_id):
+        await sync_gmail_messages(user_id, notification_history_id, session)
+
+
+
+async def sync_gmail_messages(user_id: int, notification_history_id: int, session: AsyncSessionDep):
+    """
+    Ingest the messages added since the user's sync cursor and advance it.
+    Callers hold gmail_sync_lock for the user.
+    """
+    # Get valid (refreshed if needed) access token for this user
+    access_token = await get_valid_google_access_token(user_id, session)
+
+    history = None
+    cursor = await get_gmail_sync_cursor(user_id, session)
+    if cursor:
+        history = await fetch_gmail_history_message_ids(access_token, cursor.history_id)
+
+    if history is None:
+        # No cursor yet, or it is older than Gmail keeps history for:
+        # take the newest message and start syncing from this notification.
+        latest_message_id = await fetch_user_gmail_latest_message_id(access_token)
+        message_ids = [latest_message_id] if latest_message_id else []
+        latest_history_id = notification_history_id
+    else:
+        message_ids, latest_history_id = history
+
+    pending_ids = []
+    for message_id in message_ids:
+        if not await EmailSummary_service.get_summary_by_message_id(message_id, session):
+            pending_ids.append(message_id)
+
+    mails = await fetch_gmail_messages(access_token, pending_ids)
+    for mail in mails:
+        await process_gmail_message(user_id, mail, session)
+
+    await save_gmail_sync_cursor(user_id, latest_history_id, session)
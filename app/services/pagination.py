@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, Query
+from sqlalchemy import tuple_, desc
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_date: datetime, row_id: int) -> str:
+    raw = json.dumps([created_date.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_date, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_date), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class PageParams:
+    """
+    Keyset pagination query parameters: `limit` and the opaque `cursor`
+    returned as `next_cursor` by the previous page.
+    """
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    ):
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+
+PageDep = Annotated[PageParams, Depends(PageParams)]
+
+
+async def fetch_page(statement, created_column, id_column, page: PageParams, session, scalars: bool = False):
+    """
+    Run `statement` newest first, keyed on (created_column, id_column), and return
+    (rows, next_cursor). Seeks past the cursor instead of using OFFSET, so every page
+    costs the same however deep it is.
+    Use scalars=True when the statement selects an ORM entity.
+    """
+    if page.after:
+        statement = statement.where(tuple_(created_column, id_column) < page.after)
+    statement = statement.order_by(desc(created_column), desc(id_column)).limit(page.limit + 1)
+
+    result = await session.execute(statement)
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
@@ -1,36 +1,39 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.profile_model import Profile
 from app.db.schemas.profile import ProfileCreate, ProfileUpdate
+from app.services.pagination import PageParams, fetch_page
 
 
-def get_profile_by_user_id(user_id: int, session: Session):
-    return session.query(Profile).filter(Profile.user_id == user_id).first()
+async def get_profile_by_user_id(user_id: int, session: AsyncSession):
+    statement = select(Profile).where(Profile.user_id == user_id)
+    return (await session.execute(statement)).scalars().first()
 
 
-def create_profile(data: ProfileCreate, session: Session):
+async def create_profile(data: ProfileCreate, session: AsyncSession):
     new_profile = Profile(**data.model_dump())
     session.add(new_profile)
-    session.commit()
-    session.refresh(new_profile)
+    await session.commit()
+    await session.refresh(new_profile)
     return new_profile
 
 
-def update_profile(profile: Profile, data: ProfileUpdate, session: Session):
+async def update_profile(profile: Profile, data: ProfileUpdate, session: AsyncSession):
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(profile, field, value)
-    session.commit()
-    session.refresh(profile)
+    await session.commit()
+    await session.refresh(profile)
     return profile
 
 
-def list_profiles(session: Session):
-    return session.query(Profile).all()
+async def list_profiles(page: PageParams, session: AsyncSession):
+    return await fetch_page(select(Profile), Profile.profile_created_date, Profile.profile_id, page, session, scalars=True)
 
 
-def delete_profile(user_id: int, session: Session):
-    profile = get_profile_by_user_id(user_id, session)
+async def delete_profile(user_id: int, session: AsyncSession):
+    profile = await get_profile_by_user_id(user_id, session)
     if not profile:
         return False
-    session.delete(profile)
-    session.commit()
+    await session.delete(profile)
+    await session.commit()
     return True
@@ -1,19 +1,200 @@
-from app.db.session import SessionDep
+import difflib
+import json
+import re
+from app.core import ai
+from app.core.config import settings
+from app.db.session import AsyncSessionDep
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func
+from typing import Optional
 from app.db.models.user_model import User
 from pydantic import EmailStr
-from app.db.models.resources_model import Resource
+from app.db.models.resources_model import Resource, BookRecommendationCache
+from app.services.pagination import PageParams, fetch_page
+from app.services.table_cache_service import TableCache
 
 
-def list_user_resources(user_id: int, resource_type: str, session: SessionDep):
+# Recommendations shared across users in the book_recommendation_cache table
+book_cache = TableCache(
+    name="Book",
+    model=BookRecommendationCache,
+    key_column=BookRecommendationCache.topic_key,
+    value_column=BookRecommendationCache.data,
+    ttl_seconds=settings.BOOK_CACHE_TTL_SECONDS,
+    max_entries=settings.BOOK_CACHE_MAX_ENTRIES,
+    memory_entries=settings.BOOK_CACHE_MEMORY_ENTRIES,
+)
+
+# Exams with a canonical category mapping in the prompt, misspellings of these share their entry
+CANONICAL_BOOK_TOPICS = ["neet", "jee", "cuet", "upsc"]
+BOOK_TOPIC_FILLER_WORDS = {"exam", "exams", "book", "books", "for", "the", "preparation", "prep"}
+
+BOOK_DATA_FORMAT = '{"topic":"<string>","recommended_books":[{"category":"<string>","books":[{"Book_name":"<book title>","Year_of_publication":"<YYYY>","source":"<optional URL or empty string>","Publisher":"<optional name of publisher or empty strin>","Authors":"<name of authors>","ISBN":"<ISBN on book>"},{"Book_name":"<book title>","Year_of_publication":"<YYYY>","source":"<optional URL or empty string>","Publisher":"<optional name of publisher or empty strin>","Authors":"<name of authors>","ISBN":"<ISBN on book>"},{"Book_name":"<book title>","Year_of_publication":"<YYYY>","Publisher":"<optional name of publisher or empty strin>","Authors":"<name of authors>","source":"<optional URL or empty string>","ISBN":"<ISBN on book>"}]}]}'
+
+BOOK_SYSTEM_PROMPT = f"""
+    You are an assistant named Siksha Sathi AI.
+    Task: Based on the provided topic, suggest relevant and verifiable study-related books.
+
+    STRICT RULES (must follow exactly):
+
+    1. Output ONLY a single JSON object — no greetings, explanations, markdown, or code fences.
+
+
+    2. The JSON must follow this exact structure:
+
+    {BOOK_DATA_FORMAT}
+
+
+    3. Category mapping (use these canonical names when the topic matches exactly, case-insensitive):
+
+    NEET => Physics, Chemistry, Biology, Mock Tests
+
+    JEE => Physics, Chemistry, Mathematics, Mock Tests
+
+    CUET => English, Aptitude, Domain Subjects, Previous Papers
+
+    UPSC => Prelims, Mains, General Studies, Optional Subjects, Current Affairs
+
+    Other topics: infer 2–3 logical categories and use simple canonical names (e.g., "Core", "Supplementary").
+
+
+
+    4. Each category MUST contain exactly 3 books. Do not output fewer or more.
+
+
+    5. Prefer books published 2018–2025. Allow canonical older texts if still widely used; when older texts are used, set Year_of_publication to the actual year.
+
+
+    6. If a book title or publication year cannot be verified confidently, DO NOT invent it. Instead, output exactly:
+    {{ "error": "no relevant books found" }}
+
+
+    7. Book_name must be short, realistic, and directly relevant to the category. Do NOT include author names, publisher names, prices, or commentary inside Book_name.
+
+
+    8. Year_of_publication must be a 4-digit year string (e.g., "2025").
+
+
+    9. The "source" field is optional. If a reliable URL is known (publisher page, ISBN entry, or official exam resource), include it; otherwise set it to an empty string "".
+
+
+    10. Do NOT add any fields beyond the ones specified above.
+
+
+    11. JSON Object must be valid and parseable: properly quoted, no trailing commas, no commentary.
+
+
+    12. Output language must be English.
+
+
+    13. If the topic is ambiguous or contains typos, attempt the best interpretation using canonical mappings (do not ask clarifying questions).
+    """
+
+
+def build_book_user_prompt(topic: str) -> str:
+    return f"""
+    Generate a JSON response for the topic below:
+    Topic: {topic}
+
+    Goal: Recommend up-to-date, verifiable study-related books (latest editions when available) relevant to this topic.
+    Automatically organize the books into relevant categories inferred from the exam or study topic.
+    Return only valid JSON following the specified structure and rules in the system prompt.
+    """
+
+
+RESOURCE_LIST_COLUMNS = (Resource.id, Resource.user_id, Resource.data, Resource.resource_type, Resource.created_date)
+
+BOOK_SUMMARY_COLUMNS = (
+    Resource.id,
+    Resource.data["topic"].as_string().label("topic"),
+    func.jsonb_path_query_array(Resource.data, "$.recommended_books[*].category").label("categories"),
+    Resource.created_date,
+)
+
+
+async def list_user_resources(user_id: int, resource_type: str, page: PageParams, session: AsyncSessionDep):
     try:
-        statement = select(Resource).where(Resource.user_id == user_id, Resource.resource_type == resource_type)
-        result =  session.execute(statement).mappings().all()
-        resources = []
-        for row in result:
-            resources.append(row.Resource.__dict__)
+        statement = select(*RESOURCE_LIST_COLUMNS).where(Resource.user_id == user_id, Resource.resource_type == resource_type)
+        rows, next_cursor = await fetch_page(statement, Resource.created_date, Resource.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
+    except Exception as e:
+        print(e)
+        return [], None
+
 
-        return resources
+async def search_user_books(
+    user_id: int,
+    page: PageParams,
+    session: AsyncSessionDep,
+    topic: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    try:
+        statement = select(*BOOK_SUMMARY_COLUMNS).where(Resource.user_id == user_id, Resource.resource_type == "books")
+        if topic:
+            statement = statement.where(Resource.data["topic"].as_string().ilike(f"%{topic}%"))
+        if category:
+            # Containment is answered by the GIN index on data
+            statement = statement.where(Resource.data.contains({"recommended_books": [{"category": category}]}))
+        rows, next_cursor = await fetch_page(statement, Resource.created_date, Resource.id, page, session)
+        return [row._asdict() for row in rows], next_cursor
     except Exception as e:
         print(e)
+        return [], None
+
+
+def book_topic_key(topic: str) -> str:
+    """
+    Case folded topic without punctuation or filler words, so "NEET books" and "neet"
+    share an entry. Close misspellings of the canonical exams map onto them.
+    """
+    words = re.sub(r"[^\w\s]", " ", topic.casefold()).split()
+    key = " ".join(word for word in words if word not in BOOK_TOPIC_FILLER_WORDS) or " ".join(words)
+
+    # Shorter keys are left alone, "cet" is another exam rather than a typo of "cuet"
+    match = difflib.get_close_matches(key, CANONICAL_BOOK_TOPICS, n=1, cutoff=0.75)
+    if match and len(key) >= len(match[0]):
+        return match[0]
+    return key[:200]
+
+
+async def generate_book_recommendations(topic: str) -> dict:
+    # Topics with the same cache key share one completion, e.g. a class asking for "NEET" and "neet books"
+    book_completion = await ai.chat_completion(
+        coalesce_key=f"books:{book_topic_key(topic)}",
+        messages=[
+            {
+                "role": "system",
+                "content": BOOK_SYSTEM_PROMPT,
+            },
+            {
+                "role": "user",
+                "content": build_book_user_prompt(topic),
+            },
+        ],
+    )
+
+    return json.loads(book_completion)
+
+
+async def get_or_generate_book_recommendations(topic: str, session: AsyncSessionDep) -> dict:
+    """
+    Return the cached recommendations for the normalized topic if there are fresh ones,
+    otherwise generate them with the LLM and cache them for every user.
+    """
+    key = book_topic_key(topic)
+
+    book_data = await book_cache.get(key, session)
+    if book_data is not None:
+        return book_data
+
+    # End the read transaction, the pooled connection is not held while the LLM answers
+    await session.commit()
+    book_data = await generate_book_recommendations(topic)
+
+    # The prompt asks for {"error": ...} when no verifiable books exist, retry those next time
+    if "error" in book_data:
+        return book_data
+
+    await book_cache.set(key, book_data, session)
+    return book_data
@@ -0,0 +1,153 @@
+import re
+import zlib
+from typing import Optional
+import numpy as np
+from app.core.config import settings
+
+# Words that carry no topic, dropped so "what is ohm's law" and "ohms law" embed the same
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "what", "whats", "of", "in", "on", "to", "and",
+    "please", "me", "tell", "about", "explain", "define", "can", "you",
+}
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.5
+
+# Tokens that flip the meaning of a question while barely moving its embedding,
+# "0 to pi" vs "0 to 2 pi" or "does ice float" vs "does ice not float"
+NEGATION_WORDS = {
+    "not", "no", "never", "nor", "without", "cannot", "cant", "dont", "doesnt", "didnt",
+    "isnt", "arent", "wasnt", "werent", "wont", "wouldnt", "shouldnt", "couldnt",
+}
+# Numbers, single math operators, or runs of letters
+GUARD_PATTERN = re.compile(r"\d+(?:\.\d+)?|[+\-*/^=<>%]|[^\W\d_]+")
+
+
+def guard_tokens(text: str) -> tuple:
+    """
+    Numbers, math operators and negations of the text, in order. A cached answer is only
+    served when these match exactly.
+    """
+    tokens = GUARD_PATTERN.findall(text.casefold().replace("'", ""))
+    return tuple(token for token in tokens if not token.isalpha() or token in NEGATION_WORDS)
+
+
+def embed(text: str, dim: int) -> Optional[np.ndarray]:
+    """
+    Hashed bag of words and character trigrams, L2 normalized, so the dot product of two
+    embeddings is their cosine similarity. Deterministic and CPU only, no model to load.
+    Returns None when the text has no topic words.
+    """
+    words = [word for word in re.findall(r"\w+", text.casefold().replace("'", "")) if word not in STOP_WORDS]
+    if not words:
+        return None
+
+    features, weights = [], []
+    for word in words:
+        features.append("w:" + word)
+        weights.append(WORD_WEIGHT)
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features.append("c:" + padded[i:i + 3])
+            weights.append(TRIGRAM_WEIGHT)
+
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32, count=len(features))
+    # One hash bit picks the sign, so colliding features tend to cancel instead of adding up
+    signs = np.where(hashes & 0x10000, 1.0, -1.0).astype(np.float32)
+
+    vector = np.zeros(dim, dtype=np.float32)
+    np.add.at(vector, hashes % dim, signs * np.asarray(weights, dtype=np.float32))
+
+    norm = np.linalg.norm(vector)
+    if not norm:
+        return None
+    return vector / norm
+
+
+class SemanticCache:
+    """
+    Fixed size matrix of query embeddings with their answers. A lookup is one
+    matrix-vector product over every entry, a hit needs the similarity threshold and
+    the same guard tokens; the least recently used entry is replaced once the cache
+    is full. Not thread safe, use it from the event loop.
+    """
+    def __init__(self, max_entries: int, threshold: float, dim: int):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.dim = dim
+
+        self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self.last_used = np.zeros(max_entries, dtype=np.int64)
+        self.answers: list[Optional[str]] = [None] * max_entries
+        self.guards: list[Optional[tuple]] = [None] * max_entries
+        self.size = 0
+        self.clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _match(self, vector: np.ndarray, guard: tuple) -> int:
+        """
+        Index of the most similar entry above the threshold with the same guard tokens, or -1.
+        """
+        if not self.size:
+            return -1
+        similarities = self.vectors[:self.size] @ vector
+        candidates = np.flatnonzero(similarities >= self.threshold)
+        for index in candidates[np.argsort(-similarities[candidates])]:
+            if self.guards[index] == guard:
+                return int(index)
+        return -1
+
+    def get(self, query: str) -> Optional[str]:
+        vector = embed(query, self.dim)
+        index = self._match(vector, guard_tokens(query)) if vector is not None else -1
+        if index < 0:
+            self.misses += 1
+            return None
+
+        self.clock += 1
+        self.last_used[index] = self.clock
+        self.hits += 1
+        return self.answers[index]
+
+    def set(self, query: str, answer: str):
+        vector = embed(query, self.dim)
+        if vector is None:
+            return
+
+        guard = guard_tokens(query)
+        index = self._match(vector, guard)
+        if index < 0:
+            if self.size < self.max_entries:
+                index = self.size
+                self.size += 1
+            else:
+                index = int(np.argmin(self.last_used))
+                self.evictions += 1
+
+        self.clock += 1
+        self.vectors[index] = vector
+        self.answers[index] = answer
+        self.guards[index] = guard
+        self.last_used[index] = self.clock
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# Answers to first questions on the public chat, where there is no history or user context
+public_chat_cache = SemanticCache(
+    max_entries=settings.PUBLIC_CHAT_CACHE_MAX_ENTRIES,
+    threshold=settings.PUBLIC_CHAT_CACHE_THRESHOLD,
+    dim=settings.PUBLIC_CHAT_CACHE_DIM,
+)
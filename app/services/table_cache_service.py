@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from cachetools import TLRUCache
+from sqlalchemy import select, desc, delete, update, bindparam, func
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.session import AsyncSessionDep
+
+
+class TableCache:
+    """
+    Results shared across users: a table row per key with a per-process memory front.
+    The model needs `hits`, `created_date` and `last_used_date` columns. A row is fresh
+    for ttl_seconds after it was written, memory entries expire with their row. Memory
+    hits are counted and written to the table in batches by maintenance_loop, which also
+    prunes expired rows and the least recently used ones beyond max_entries.
+    """
+    def __init__(self, name: str, model, key_column, value_column, ttl_seconds: int, max_entries: int, memory_entries: int):
+        self.name = name
+        self.model = model
+        self.key_column = key_column
+        self.value_column = value_column
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # key -> (expires_at, value), expires_at is a time.time() timestamp
+        self.memory = TLRUCache(maxsize=memory_entries, ttu=lambda key, entry, now: entry[0], timer=time.time)
+        # Memory hits not yet written to the table: key -> hits
+        self.usage = Counter()
+
+    async def get(self, key: str, session: AsyncSessionDep):
+        """
+        The fresh value for the key from memory or the table, or None.
+        """
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.usage[key] += 1
+            return entry[1]
+
+        now = datetime.now(timezone.utc)
+        row = await session.get(self.model, key)
+        if not row or row.created_date <= now - timedelta(seconds=self.ttl_seconds):
+            return None
+
+        row.hits = row.hits + 1
+        row.last_used_date = now
+        await session.commit()
+
+        value = getattr(row, self.value_column.key)
+        self.memory[key] = (row.created_date.timestamp() + self.ttl_seconds, value)
+        return value
+
+    async def set(self, key: str, value, session: AsyncSessionDep):
+        """
+        Store a freshly generated value, replacing an expired row for the key.
+        """
+        now = datetime.now(timezone.utc)
+        fields = {self.value_column.key: value, "hits": 0, "created_date": now, "last_used_date": now}
+
+        statement = insert(self.model).values({self.key_column.key: key, **fields})
+        statement = statement.on_conflict_do_update(index_elements=[self.key_column], set_=fields)
+        await session.execute(statement)
+        await session.commit()
+
+        self.memory[key] = (now.timestamp() + self.ttl_seconds, value)
+
+    async def flush_usage(self, session: AsyncSessionDep):
+        """
+        Write the memory hits since the last flush to the table in one batch,
+        so entries served from memory are not the first ones pruned.
+        """
+        if not self.usage:
+            return
+        usage = [{"key": key, "count": count} for key, count in self.usage.items()]
+        self.usage.clear()
+
+        table = self.model.__table__
+        statement = (
+            update(table)
+            .where(table.c[self.key_column.key] == bindparam("key"))
+            .values(hits=table.c.hits + bindparam("count"), last_used_date=func.now())
+        )
+        await session.execute(statement, usage)
+
+    async def prune(self, session: AsyncSessionDep):
+        """
+        Drop expired rows and the least recently used ones beyond max_entries.
+        """
+        expires_before = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        await session.execute(delete(self.model).where(self.model.created_date < expires_before))
+
+        overflow = (
+            select(self.key_column)
+            .order_by(desc(self.model.last_used_date))
+            .offset(self.max_entries)
+        )
+        await session.execute(delete(self.model).where(self.key_column.in_(overflow)))
+
+    async def maintenance_loop(self):
+        """
+        Background task: flush usage and prune every CACHE_MAINTENANCE_INTERVAL_SECONDS,
+        instead of on every cache miss.
+        """
+        while True:
+            await asyncio.sleep(settings.CACHE_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.flush_usage(session)
+                    await self.prune(session)
+                    await session.commit()
+            except Exception as e:
+                print(f"{self.name} cache maintenance failed:", e)
@@ -1,13 +1,14 @@
-from app.db.session import SessionDep
+from app.db.session import AsyncSessionDep
 from fastapi import HTTPException
 from sqlalchemy import select
 from app.db.models.user_model import User
 from pydantic import EmailStr
+from app.services.pagination import PageParams, fetch_page
 
-def get_user(user_id: int, session: SessionDep):
+async def get_user(user_id: int, session: AsyncSessionDep):
     user_in_db = None
     try:
-        user_in_db = session.get(User, user_id)
+        user_in_db = await session.get(User, user_id)
     except Exception as e:
         print(e)
 
@@ -18,10 +19,10 @@ def get_user(user_id: int, session: SessionDep):
 
 
 
-def get_user_by_email(email: EmailStr, session: SessionDep):
+async def get_user_by_email(email: EmailStr, session: AsyncSessionDep):
     try:
         statement = select(User).where(User.user_email == email)
-        user_in_db = session.execute(statement).scalar_one_or_none()
+        user_in_db = (await session.execute(statement)).scalar_one_or_none()
         if user_in_db:
             return user_in_db.__dict__
         return None
@@ -30,14 +31,16 @@ def get_user_by_email(email: EmailStr, session: SessionDep):
         return None
 
 
-def list_users(session: SessionDep):
-    try:
-        statement = select(User)
-        result =  session.execute(statement).mappings().all()
-        users = []
-        for row in result:
-            users.append(row.User.__dict__)
+# UserPublic fields, the password hash is never selected
+USER_LIST_COLUMNS = (User.user_id, User.user_full_name, User.user_email, User.user_phone, User.user_is_admin, User.user_data)
+
 
-        return users
+async def list_users(page: PageParams, session: AsyncSessionDep):
+    try:
+        # user_created_date is selected for the cursor only, it is not part of UserPublic
+        statement = select(*USER_LIST_COLUMNS, User.user_created_date)
+        rows, next_cursor = await fetch_page(statement, User.user_created_date, User.user_id, page, session)
+        return [{column.key: getattr(row, column.key) for column in USER_LIST_COLUMNS} for row in rows], next_cursor
     except Exception as e:
-        print(e)
\ No newline at end of file
+        print(e)
+        return [], None
\ No newline at end of file
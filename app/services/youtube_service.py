@@ -0,0 +1,160 @@
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import httpx
+from cachetools import TTLCache
+from fastapi import HTTPException
+from app.core import ai
+from app.core.config import settings
+from app.core.http import google_client
+
+YT_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+
+# Daily YouTube Data API quota resets at midnight Pacific time
+YT_QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+YT_QUOTA_ERRORS = {"quotaExceeded", "dailyLimitExceeded"}
+# Short throttles, over within seconds
+YT_RATE_LIMIT_ERRORS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+# Normalized topic -> LLM written search query, the rewrite is stable so it is kept long
+query_cache = TTLCache(maxsize=settings.YT_CACHE_MAX_ENTRIES, ttl=settings.YT_QUERY_CACHE_TTL_SECONDS)
+# Normalized query -> videos, fresh results are reused for a few hours
+search_cache = TTLCache(maxsize=settings.YT_CACHE_MAX_ENTRIES, ttl=settings.YT_SEARCH_CACHE_TTL_SECONDS)
+# Older results, only served while searches are paused
+stale_search_cache = TTLCache(maxsize=settings.YT_CACHE_MAX_ENTRIES, ttl=settings.YT_SEARCH_STALE_TTL_SECONDS)
+
+# time.time() before which no search is sent, because the daily quota is spent or we are rate limited
+searches_paused_until = 0.0
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def next_quota_reset() -> float:
+    now = datetime.now(YT_QUOTA_TIMEZONE)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+async def get_search_query(topic: str) -> str:
+    """
+    Convert a raw topic into a concise YouTube search line, cached by normalized topic.
+    """
+    key = normalize(topic)
+    query = query_cache.get(key)
+    if query is not None:
+        return query
+
+    generate_yt_query_prompt = f"""
+    You are a smart assistant that converts any raw user input into a concise YouTube search query.
+    Instructions:
+    - Take the given raw_prompt and create a short, natural search line for YouTube.
+    - do not make it too longer.
+    - Focus on relevance and clarity.
+    - Output ONLY the final search line, in plain English. No quotes, explanations, or JSON.
+
+    Raw_prompt: "{topic}"
+    """
+
+    query = await ai.chat_completion(
+        coalesce_key=f"yt-query:{key}",
+        messages=[
+            {
+                "role": "user",
+                "content": generate_yt_query_prompt,
+            },
+        ],
+    )
+    query = query.strip().strip('"')
+
+    query_cache[key] = query
+    return query
+
+
+def error_reasons(response: httpx.Response) -> set[str]:
+    try:
+        errors = response.json().get("error", {}).get("errors", [])
+    except ValueError:
+        return set()
+    return {error.get("reason") for error in errors}
+
+
+def pause_seconds(response: httpx.Response):
+    """
+    How long to stop searching after this response: until the quota reset for daily
+    quota errors, a few seconds (Retry-After when given) for rate limits, None otherwise.
+    """
+    if response.status_code not in (403, 429):
+        return None
+
+    reasons = error_reasons(response)
+    if response.status_code == 403 and reasons & YT_QUOTA_ERRORS:
+        return next_quota_reset() - time.time()
+
+    if response.status_code == 429 or reasons & YT_RATE_LIMIT_ERRORS:
+        retry_after = response.headers.get("retry-after", "")
+        return int(retry_after) if retry_after.isdigit() else settings.YT_RATE_LIMIT_BACKOFF_SECONDS
+
+    return None
+
+
+async def search_videos(query: str) -> list[dict]:
+    """
+    Search YouTube videos for the query, served from cache when possible.
+    While the daily quota is exhausted or we are rate limited no request is sent and
+    stale results are returned instead, or 503 when there are none.
+    """
+    global searches_paused_until
+
+    key = normalize(query)
+    videos = search_cache.get(key)
+    if videos is not None:
+        return videos
+
+    if time.time() < searches_paused_until:
+        return stale_or_unavailable(key)
+
+    params = {
+        "q": query,
+        "part": "snippet",
+        "type": "video",
+        "maxResults": 10,
+        "key": settings.YT_API,
+    }
+    try:
+        response = await google_client.get(YT_SEARCH_URL, params=params)
+    except httpx.HTTPError as e:
+        print("YouTube search error:", e)
+        raise HTTPException(status_code=502, detail="YouTube search failed")
+
+    pause = pause_seconds(response)
+    if pause is not None:
+        print(f"YouTube search paused for {int(pause)}s:", response.text)
+        searches_paused_until = max(searches_paused_until, time.time() + pause)
+        return stale_or_unavailable(key)
+
+    if response.status_code != 200:
+        print("YouTube search error:", response.status_code, response.text)
+        raise HTTPException(status_code=502, detail="YouTube search failed")
+
+    videos = [
+        {
+            "title": item["snippet"]["title"],
+            "videoId": item["id"]["videoId"],
+            "url": f'https://www.youtube.com/watch?v={item["id"]["videoId"]}'
+        }
+        for item in response.json().get("items", [])
+        if item["id"]["kind"] == "youtube#video"  # ensures it's a video, not a channel/playlist
+    ]
+
+    search_cache[key] = videos
+    stale_search_cache[key] = videos
+    return videos
+
+
+def stale_or_unavailable(key: str) -> list[dict]:
+    videos = stale_search_cache.get(key)
+    if videos is None:
+        raise HTTPException(status_code=503, detail="YouTube search is unavailable, try again later")
+    return videos
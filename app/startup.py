@@ -1,7 +1,9 @@
 import logging
-from app.db.database import engine, create_db_and_tables
+import asyncio
+from app.db.database import engine
 from sqlalchemy import text
 import os
+from app.services import resource_service, google_account_service
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -12,9 +14,22 @@ def startup():
     logger.info("\n")
     logger.info("Start up check for Fastapi Gym Management\n")
     check_db_connection()
-    init_database_models()
     create_media_folders()
 
+# Long running tasks started with the event loop, kept referenced so they are not garbage collected.
+background_tasks = set()
+
+async def start_background_tasks():
+    logger.info("Starting background tasks.....")
+    for coroutine in (
+        # Refreshes the tokens of users active on this process, the worker runs its own
+        google_account_service.refresh_expiring_tokens_loop(),
+        resource_service.book_cache.maintenance_loop(),
+    ):
+        task = asyncio.create_task(coroutine)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
 def check_db_connection():
     logger.info("Starting Database")
     logger.info("Connecting to database.....")
@@ -26,15 +41,6 @@ def check_db_connection():
         logger.error("Database connection failed!\n")
         raise e
 
-def init_database_models():
-    logger.info("Initializing Database Models.....")
-    try:
-        create_db_and_tables()
-        logger.info("Database Models initialization successfully!\n")
-    except Exception as e:
-        logger.error("Database Models initialization failed!\n")
-        raise e
-
 def create_media_folders():
     logger.info("Verifying media folder and creating if does not exists.....\n")
     try:
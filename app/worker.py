@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.services import job_service, mail_service, google_account_service, goal_service, EmailSummary_service
+# Registers the mapped classes referenced by relationships, the API gets these through its routers.
+from app.db.models import user_model, profile_model, google_account_model
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> coroutine(payload, session), its return value is stored as the job result
+HANDLERS = {
+    "gmail_notification": mail_service.process_gmail_notification,
+    goal_service.GOAL_JOB_KIND: goal_service.process_goal_generation,
+}
+
+
+async def run_next_job() -> bool:
+    """
+    Claim and run one job. Returns False when the queue is empty.
+    """
+    async with AsyncSessionLocal() as session:
+        job = await job_service.claim_job(session, kinds=list(HANDLERS))
+        if not job:
+            return False
+        job_id, kind, payload = job.id, job.kind, job.payload
+
+        # Lock expired on the last allowed attempt, the worker running it most likely crashed.
+        if job.attempts > job.max_attempts:
+            await job_service.fail_job(job_id, "Lock expired on final attempt", session)
+            return True
+
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await HANDLERS[kind](payload, session)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job_id, kind)
+        async with AsyncSessionLocal() as session:
+            job = await job_service.fail_job(job_id, repr(e), session)
+            if job.status == job_service.JOB_DEAD:
+                logger.error("Job %s (%s) moved to dead letter after %s attempts", job_id, kind, job.attempts)
+        return True
+
+    async with AsyncSessionLocal() as session:
+        await job_service.complete_job(job_id, session, result=result)
+    return True
+
+
+async def worker_loop(worker_number: int):
+    logger.info("Worker %s started", worker_number)
+    while True:
+        try:
+            has_more = await run_next_job()
+        except Exception:
+            logger.exception("Worker %s could not claim a job", worker_number)
+            has_more = False
+
+        if not has_more:
+            await asyncio.sleep(settings.WORKER_POLL_INTERVAL_SECONDS)
+
+
+async def main():
+    await asyncio.gather(
+        google_account_service.refresh_expiring_tokens_loop(),
+        EmailSummary_service.summary_cache.maintenance_loop(),
+        *(worker_loop(n) for n in range(settings.WORKER_CONCURRENCY)),
+    )
+
+
+# Run with: python -m app.worker
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())